@@ -20,10 +20,84 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
+from array import array
+from bisect import bisect_left
+
 from django.conf import settings
 from django.contrib.auth.models import User
 
 from models import *
+from cache import permission_cache
+
+_anonymous = {}
+
+def get_anonymous_user():
+    """Returns the user which holds the permissions of anonymous visitors.
+
+    The user is loaded once per process. It returns None if ANONYMOUS_USER_ID
+    is not set or points to a missing user.
+    """
+    if 'user' not in _anonymous:
+        user = None
+        user_id = getattr(settings, 'ANONYMOUS_USER_ID', None)
+        if user_id is not None:
+            try:
+                user = User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                pass
+        _anonymous['user'] = user
+    return _anonymous['user']
+
+def reset_anonymous_user():
+    """Forces the anonymous user and its permissions to be reloaded.
+    """
+    _anonymous.clear()
+
+class ObjectPermissionIndex(object):
+    """Compact index of object permissions.
+
+    The IDs of the objects are stored in sorted integer arrays, one for each
+    permission name (i.e. "app_label.codename"), so each lookup is a binary
+    search. For compatibility, the index also behaves as a read-only set of
+    "app_label.codename.object_id" strings.
+    """
+    def __init__(self, rows=()):
+        grouped = {}
+        for app_label, codename, object_id in rows:
+            grouped.setdefault("%s.%s" % (app_label, codename), set()).add(object_id)
+        self._index = dict([(perm, array('L', sorted(ids))) for perm, ids in grouped.items()])
+
+    def has_perm(self, perm, object_id):
+        ids = self._index.get(perm)
+        if not ids:
+            return False
+        i = bisect_left(ids, object_id)
+        return i < len(ids) and ids[i] == object_id
+
+    def get_object_ids(self, perm):
+        return self._index.get(perm, ())
+
+    def has_module_perms(self, app_label):
+        prefix = "%s." % app_label
+        for perm in self._index:
+            if perm.startswith(prefix):
+                return True
+        return False
+
+    def __contains__(self, value):
+        perm, sep, object_id = value.rpartition('.')
+        try:
+            return self.has_perm(perm, int(object_id))
+        except ValueError:
+            return False
+
+    def __iter__(self):
+        for perm, ids in self._index.iteritems():
+            for object_id in ids:
+                yield u"%s.%d" % (perm, object_id)
+
+    def __len__(self):
+        return sum([len(ids) for ids in self._index.itervalues()])
 
 class ObjectPermissionBackend(object):
     """Backend which enables support for row-level permissions.
@@ -39,22 +113,46 @@ class ObjectPermissionBackend(object):
         if not hasattr(user_obj, '_group_obj_perm_cache'):
             perms = ObjectPermission.objects.get_group_permissions(user_obj)
             perms = perms.values_list('perm__content_type__app_label', 'perm__codename', 'object_id').order_by()
-            user_obj._group_obj_perm_cache = set(["%s.%s.%s" % (ct, name, obj_id) for ct, name in perms])
+            user_obj._group_obj_perm_cache = ObjectPermissionIndex(perms)
         return user_obj._group_obj_perm_cache
 
     def get_all_permissions(self, user_obj):
         if user_obj.is_anonymous():
-            return set()
+            return self._get_anonymous_permissions()
         if not hasattr(user_obj, '_obj_perm_cache'):
-            user_obj._obj_perm_cache = set([u"%s.%s.%s" % (p.perm.content_type.app_label, p.perm.codename, p.object_id) for p in user_obj.objectpermissions.all()])
-            user_obj._obj_perm_cache.update(self.get_group_permissions(user_obj))
+            user_obj._obj_perm_cache = permission_cache.get(user_obj.pk, lambda: self._load_permissions(user_obj))
         return user_obj._obj_perm_cache
 
+    def _load_permissions(self, user_obj):
+        """Loads all the object permissions of the user (and his groups) with a single query.
+        """
+        perms = ObjectPermission.objects.get_all_permissions(user_obj)
+        perms = perms.values_list('perm__content_type__app_label', 'perm__codename', 'object_id').order_by()
+        return ObjectPermissionIndex(perms)
+
+    def _get_anonymous_permissions(self):
+        """Returns the permissions of the anonymous user, kept in process memory.
+
+        They are rebuilt only when their version in the cache backend changes.
+        """
+        user_obj = get_anonymous_user()
+        if user_obj is None:
+            return ObjectPermissionIndex()
+        version = permission_cache.get_version(user_obj.pk)
+        cached = _anonymous.get('perms')
+        if cached is None or cached[0] != version:
+            perms = permission_cache.get(user_obj.pk, lambda: self._load_permissions(user_obj))
+            cached = _anonymous['perms'] = (version, perms)
+        return cached[1]
+
     def has_perm(self, user_obj, perm, obj=None):
         """This method checks if the user_obj has perm on obj.
         """
-        if not user_obj.is_authenticated():
-            user_obj = User.objects.get(pk=settings.ANONYMOUS_USER_ID)
+        anonymous = not user_obj.is_authenticated()
+        if anonymous:
+            user_obj = get_anonymous_user()
+            if user_obj is None:
+                return False
 
         if user_obj.is_superuser:
             return True
@@ -68,4 +166,9 @@ class ObjectPermissionBackend(object):
         if isinstance(perm, Permission):
             perm = "%s.%s" % (perm.content_type.app_label, perm.codename)
 
-        return "%s.%d" % (perm, obj.pk) in self.get_all_permissions(user_obj)
+        if anonymous:
+            perms = self._get_anonymous_permissions()
+        else:
+            perms = self.get_all_permissions(user_obj)
+
+        return perms.has_perm(perm, obj.pk)
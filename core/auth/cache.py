@@ -20,6 +20,13 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
+import threading
+
+from django.core.cache import cache
+from django.conf import settings
+
+from prometeo.core.utils.cache import get_versions, bump_version, CacheStats
+
 # Inspired by http://stackoverflow.com/a/7469395/1063729
 
 class _Singleton(type):
@@ -34,15 +41,32 @@ class _Singleton(type):
         return cls.instance
 
 class LoggedInUserCache(object):
-    """Stores the current user as a member attribute of a singleton.
+    """Stores the current user in a thread-local member of a singleton.
+
+    Each thread sees only the user of the request it is serving, so the
+    process can serve concurrent requests safely.
     """
     __metaclass__ = _Singleton
 
-    user = None
+    def __init__(self):
+        self._local = threading.local()
+
+    def _get_user(self):
+        return getattr(self._local, 'user', None)
+
+    def _set_user(self, user):
+        self._local.user = user
+
+    user = property(_get_user, _set_user)
 
     def set_user(self, request):
         if request.user.is_authenticated():
             self.user = request.user
+        else:
+            self.user = None
+
+    def clear(self):
+        self.user = None
 
     @property
     def current_user(self):
@@ -50,4 +74,57 @@ class LoggedInUserCache(object):
 
     @property
     def has_user(self):
-        return user is not None
+        return self.user is not None
+
+class ObjectPermissionCache(CacheStats):
+    """Stores the object permissions of each user in the cache backend.
+
+    Entries are shared by all the processes using the same cache backend and
+    are keyed by the user's version and by a global version: bumping one of
+    them invalidates the related entries without deleting any key.
+    """
+    key_prefix = 'objperms'
+    stats_name = 'objperms'
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'OBJECT_PERMISSION_CACHE_TIMEOUT', 3600)
+
+    def _version_key(self, user_id=None):
+        if user_id is None:
+            return "%s:version" % self.key_prefix
+        return "%s:version:%s" % (self.key_prefix, user_id)
+
+    def get_version(self, user_id):
+        """Returns the current version of the permissions of the given user.
+
+        It changes every time the permissions of the user are invalidated.
+        """
+        return tuple(get_versions([self._version_key(), self._version_key(user_id)]))
+
+    def _data_key(self, user_id):
+        global_version, user_version = self.get_version(user_id)
+        return "%s:%s:%s:%s" % (self.key_prefix, user_id, global_version, user_version)
+
+    def get(self, user_id, builder=None):
+        """Returns the cached permissions of the given user.
+
+        On a miss, if a "builder" callable is given, its result is stored
+        and returned.
+        """
+        key = self._data_key(user_id)
+        value = self.count_lookup(cache.get(key))
+        if value is not None:
+            return value
+        if callable(builder):
+            value = builder()
+            cache.set(key, value, self.timeout)
+        return value
+
+    def invalidate(self, user_id=None):
+        """Invalidates the permissions of the given user.
+
+        If no user is given, the permissions of all users are invalidated.
+        """
+        bump_version(self._version_key(user_id))
+
+permission_cache = ObjectPermissionCache()
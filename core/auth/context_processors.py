@@ -23,28 +23,60 @@ __version__ = '0.0.5'
 from django.utils.functional import lazy
 
 from models import *
+from backends import ObjectPermissionIndex, ObjectPermissionBackend
 
 # ObjPermWrapper and ObjPermLookupDict proxy the permissions system into objects
 # that the template system can understand.
 
+def _get_permission_index(user):
+    if user.is_authenticated() and not user.is_active:
+        return ObjectPermissionIndex()
+    return ObjectPermissionBackend().get_all_permissions(user)
+
+class ObjPermSet(object):
+    """Lazy set of the IDs of the objects the user has "perm" on.
+
+    Membership tests are lookups in the user's permission index: no queries
+    are issued and no object is loaded.
+    """
+    def __init__(self, user, perm):
+        self.user, self.perm = user, perm
+
+    def __contains__(self, object_id):
+        if self.user.is_superuser:
+            return True
+        try:
+            object_id = int(object_id)
+        except (TypeError, ValueError):
+            return False
+        return _get_permission_index(self.user).has_perm(self.perm, object_id)
+
+    def __iter__(self):
+        return iter(_get_permission_index(self.user).get_object_ids(self.perm))
+
+    def __len__(self):
+        return len(_get_permission_index(self.user).get_object_ids(self.perm))
+
+    def __nonzero__(self):
+        return self.user.is_superuser or len(self) > 0
+
+    def __repr__(self):
+        return str(list(self))
+
 class ObjPermLookupDict(object):
     def __init__(self, user, module_name):
         self.user, self.module_name = user, module_name
 
     def __repr__(self):
-        return str([p for p in self.user.get_all_permissions() if len(p.split('.')) == 3])
+        return str([p for p in _get_permission_index(self.user) if p.startswith("%s." % self.module_name)])
 
     def __getitem__(self, perm_name):
-        if self.user.is_superuser:
-            perms = Permission.objects.filter(content_type__app_label=self.module_name, codename=perm_name)
-            return [obj.pk for p in perms for obj in p.content_type.model_class().objects.all()]
-        return [p.object_id for p in self.user.objectpermissions.filter(perm__content_type__app_label=self.module_name, perm__codename=perm_name)]
+        return ObjPermSet(self.user, "%s.%s" % (self.module_name, perm_name))
 
     def __nonzero__(self):
         if self.user.is_superuser:
             return True
-        return self.user.objectpermissions.filter(perm__contentype__app_label=self.module_name).exists()
-
+        return _get_permission_index(self.user).has_module_perms(self.module_name)
 
 class ObjPermWrapper(object):
     def __init__(self, user):
@@ -30,6 +30,23 @@ from django.conf import settings
 from django.contrib.auth import REDIRECT_FIELD_NAME
 from django.utils.decorators import available_attrs
 
+def get_cached_obj(request, get_obj_func, *args, **kwargs):
+    """Returns the object returned by "get_obj_func", memoized on the request.
+
+    The object is resolved only once per request and set of arguments, so
+    stacked decorators and the decorated view itself can share it without
+    hitting the db again, as long as they pass the same arguments.
+    """
+    try:
+        key = (get_obj_func, args, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        return get_obj_func(request, *args, **kwargs)
+    objs = request.__dict__.setdefault('_cached_objs', {})
+    if key not in objs:
+        objs[key] = get_obj_func(request, *args, **kwargs)
+    return objs[key]
+
 def obj_permission_required(perm, get_obj_func=None, login_url=None, redirect_field_name=REDIRECT_FIELD_NAME):
     """Checks if the user has "perm" for obj returned by "get_obj_func".
 
@@ -37,13 +54,16 @@ def obj_permission_required(perm, get_obj_func=None, login_url=None, redirect_fi
     permissions are found, the decorator checks if the user has permissions
     specific for the obj returned invoking "get_obj_func" with the arguments
     of the decorated view function.
+
+    The resolved obj is memoized on the request: views can get it back calling
+    "get_cached_obj" with the same "get_obj_func" and arguments.
     """
     def decorator(view_func):
         @wraps(view_func, assigned=available_attrs(view_func))
         def _wrapped_view(request, *args, **kwargs):
             obj = None
             if callable(get_obj_func):
-                obj = get_obj_func(request, *args, **kwargs)
+                obj = get_cached_obj(request, get_obj_func, *args, **kwargs)
             if request.user.has_perm(perm, obj):
                 return view_func(request, *args, **kwargs)
             if request.user.has_perm(perm):
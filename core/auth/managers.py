@@ -20,11 +20,64 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.db import models
+from django.db import models, connections, transaction, IntegrityError
 from django.db.models import Q, get_model, get_models, get_app
-from django.contrib.auth.models import Permission, PermissionManager
+from django.db.models.query import QuerySet
+from django.conf import settings
+from django.contrib.auth.models import Permission, PermissionManager, UserManager
 from django.contrib.contenttypes.models import ContentType
 
+from prometeo.core.utils.cache import get_versions, bump_version
+
+from cache import permission_cache
+
+PERMISSION_IDS_VERSION_KEY = 'auth:permission_ids:version'
+
+# Process-wide map of (content type ID, codename) -> permission ID, valid
+# while the shared version key keeps the value it was filled with.
+_permission_ids = {}
+_permission_ids_version = None
+
+def _concrete_model(model):
+    while model._meta.proxy:
+        model = model._meta.proxy_for_model
+    return model
+
+def _get_permission_ids():
+    """Returns the resolved permission IDs, dropping them if they are stale.
+    """
+    global _permission_ids_version
+    version = get_versions([PERMISSION_IDS_VERSION_KEY])[0]
+    if version != _permission_ids_version:
+        _permission_ids.clear()
+        _permission_ids_version = version
+    return _permission_ids
+
+def reset_permission_ids():
+    """Forgets the permission IDs resolved so far by every process.
+    """
+    _permission_ids.clear()
+    bump_version(PERMISSION_IDS_VERSION_KEY)
+
+def _insert_rows(using, model, columns, rows):
+    """Inserts the given rows into the table of model with a raw "executemany".
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    cursor = connection.cursor()
+    cursor.executemany("INSERT INTO %s (%s) VALUES (%s)" % (
+        qn(model._meta.db_table),
+        ", ".join([qn(model._meta.get_field(c).column) for c in columns]),
+        ", ".join(["%s"] * len(columns)),
+    ), rows)
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (models.Model, int, long, basestring)):
+        return [value]
+    return list(value)
+
 class MyPermissionManager(PermissionManager):
     """Custom manager for Permission model.
     """
@@ -35,6 +88,26 @@ class MyPermissionManager(PermissionManager):
         name = "Can %s %s" % (action.replace('_', ' '), ct.name)
         return Permission.objects.get_or_create(codename=codename, name=name, content_type=ct)
 
+    def get_ids_for_model(self, model, codenames):
+        """Returns the IDs of the given permissions of model, creating the missing ones.
+
+        Permissions are resolved only once per process, until any of them is
+        changed or deleted.
+        """
+        ct = ContentType.objects.get_for_model(_concrete_model(model))
+        resolved = _get_permission_ids()
+        ids = dict([(c, resolved[(ct.pk, c)]) for c in codenames if (ct.pk, c) in resolved])
+        missing = [c for c in codenames if c not in ids]
+        if missing:
+            ids.update(Permission.objects.filter(content_type=ct, codename__in=missing).values_list('codename', 'pk'))
+            for codename in missing:
+                if codename not in ids:
+                    perm, is_new = self.get_or_create_by_natural_key(codename, ct.app_label, ct.model)
+                    ids[codename] = perm.pk
+            for codename in missing:
+                resolved[(ct.pk, codename)] = ids[codename]
+        return [ids[c] for c in codenames]
+
 class ObjectPermissionManager(models.Manager):
     """Custom manager for ObjectPermission model.
     """
@@ -46,8 +119,110 @@ class ObjectPermissionManager(models.Manager):
         perm, is_new = MyPermissionManager().get_or_create_by_natural_key(codename, app_label, model)
         return self.get_or_create(perm=perm, object_id=object_id)
 
+    def grant(self, users, perms, objects):
+        """Grants the given permissions on the given objects to the given users.
+
+        "users" and "objects" can be single instances or sequences (objects
+        must be instances of the same model) and "perms" is a codename or a
+        sequence of codenames. Permissions are resolved once, while missing
+        object permissions and user grants are inserted in batches.
+        """
+        user_ids = [getattr(u, 'pk', u) for u in _as_list(users) if u]
+        objects = [o for o in _as_list(objects) if o]
+        perms = _as_list(perms)
+        if not (user_ids and objects and perms):
+            return
+
+        perm_ids = MyPermissionManager().get_ids_for_model(objects[0].__class__, perms)
+        object_ids = [o.pk for o in objects]
+
+        obj_perms = self.filter(perm__in=perm_ids, object_id__in=object_ids)
+        existing = set(obj_perms.values_list('perm', 'object_id'))
+        new_obj_perms = [(perm_id, object_id) for perm_id in perm_ids for object_id in object_ids if (perm_id, object_id) not in existing]
+        through = self.model.users.through
+        try:
+            if new_obj_perms:
+                _insert_rows(self.db, self.model, ('perm', 'object_id'), new_obj_perms)
+            obj_perm_ids = list(obj_perms.values_list('pk', flat=True))
+
+            granted = set(through.objects.filter(objectpermission__in=obj_perm_ids, user__in=user_ids).values_list('objectpermission', 'user'))
+            missing = [(op_id, user_id) for op_id in obj_perm_ids for user_id in user_ids if (op_id, user_id) not in granted]
+            if not (new_obj_perms or missing):
+                return
+
+            if missing:
+                _insert_rows(self.db, through, ('objectpermission', 'user'), missing)
+        except IntegrityError:
+            # A concurrent grant got there first: reuses its rows.
+            if transaction.is_managed(using=self.db):
+                raise
+            transaction.rollback_unless_managed(using=self.db)
+            return self.grant(user_ids, perms, objects)
+        transaction.commit_unless_managed(using=self.db)
+
+        # Raw inserts don't send "m2m_changed", so the cache is invalidated here.
+        for user_id in set([user_id for op_id, user_id in missing]):
+            permission_cache.invalidate(user_id)
+
     def get_group_permissions(self, user):
         return self.filter(groups__user=user)
 
     def get_all_permissions(self, user):
         return self.filter(Q(groups__user=user) | Q(users=user))
+
+    def get_object_ids(self, user, codename, content_type):
+        """Returns the IDs of the objects on which user has the given permission.
+
+        The result is a lazy queryset, suitable to be used as a subquery.
+        """
+        return self.get_all_permissions(user).filter(
+            perm__codename=codename,
+            perm__content_type=content_type
+        ).values('object_id')
+
+class VisibilityQuerySet(QuerySet):
+    """QuerySet which can be filtered by object/row-level permissions.
+    """
+    def visible_to(self, user, action='view'):
+        """Returns only the objects on which user has the given action permission.
+
+        Superusers see everything, otherwise the filtering is done in SQL
+        against ObjectPermission rows assigned to the user or to one of the
+        user's groups. The model-level permission doesn't widen the result:
+        list views use it as a gate and this method to filter the rows.
+        """
+        model = _concrete_model(self.model)
+        opts = model._meta
+        codename = "%s_%s" % (action, opts.object_name.lower())
+
+        if user.is_active and user.is_superuser:
+            return self
+
+        if not user.is_authenticated():
+            anonymous_id = getattr(settings, 'ANONYMOUS_USER_ID', None)
+            if anonymous_id is None:
+                return self.none()
+            user = anonymous_id
+
+        elif not user.is_active:
+            return self.none()
+
+        ct = ContentType.objects.get_for_model(model)
+        ObjectPermission = get_model('auth', 'ObjectPermission')
+        object_ids = ObjectPermission.objects.get_object_ids(user, codename, ct)
+
+        return self.filter(pk__in=object_ids)
+
+class VisibilityManager(models.Manager):
+    """Manager for models which support object/row-level permissions.
+    """
+    def get_query_set(self):
+        return VisibilityQuerySet(self.model, using=self._db)
+
+    def visible_to(self, user, action='view'):
+        return self.get_query_set().visible_to(user, action)
+
+class MyUserManager(UserManager, VisibilityManager):
+    """Custom manager for MyUser model.
+    """
+    pass
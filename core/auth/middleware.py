@@ -71,6 +71,9 @@ class RequireLoginMiddleware(object):
 
 class LoggedInUserCacheMiddleware(object):
     """Initialize the user attribute of the LoggedInUserCache class.
+
+    The user is cleared when the request ends, so a thread never carries it
+    over to the next request it serves.
     """
     def process_request(self, request):
         logged_in_user = LoggedInUserCache()
@@ -78,3 +81,13 @@ class LoggedInUserCacheMiddleware(object):
 
         return None
 
+    def process_response(self, request, response):
+        LoggedInUserCache().clear()
+
+        return response
+
+    def process_exception(self, request, exception):
+        LoggedInUserCache().clear()
+
+        return None
+
@@ -30,6 +30,8 @@ from managers import *
 class MyUser(User):
     """A Prometeo's user.
     """
+    objects = MyUserManager()
+
     class Meta:
         proxy = True
 
@@ -86,6 +88,7 @@ class ObjectPermission(models.Model):
     class Meta:
         verbose_name = _('object permission')
         verbose_name_plural = _('object permissions')
+        unique_together = (('perm', 'object_id'),)
 
     def __unicode__(self):
         return "%s | %d" % (self.perm, self.object_id)
@@ -21,17 +21,20 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 from django.db import models
-from django.db.models.signals import post_save
-from django.contrib.auth.models import User
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.contrib.auth.models import User, Permission
 from django.contrib.comments.models import Comment
 from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
 
 from prometeo.core.menus.models import Link, Bookmark
 from prometeo.core.menus.signals import manage_bookmarks
 from prometeo.core.widgets.models import Widget
 from prometeo.core.widgets.signals import manage_dashboard
 
-from cache import LoggedInUserCache
+from backends import reset_anonymous_user
+from managers import reset_permission_ids
+from cache import LoggedInUserCache, permission_cache
 from models import *
 
 ## HANDLERS ##
@@ -41,46 +44,100 @@ def user_post_save(sender, instance, signal, *args, **kwargs):
     """
     profile, is_new = UserProfile.objects.get_or_create(user=instance)
     if is_new:
-        can_view_this_user, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_user", "auth", "user", instance.pk)
-        can_change_this_user, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_user", "auth", "user", instance.pk)
-        can_delete_this_user, is_new = ObjectPermission.objects.get_or_create_by_natural_key("delete_user", "auth", "user", instance.pk)
-        can_change_user_bookmarks, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_menu", "menus", "menu", profile.bookmarks.pk)
-        can_change_user_dashboard, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_region", "widgets", "region", profile.dashboard.pk)
+        ObjectPermission.objects.grant(instance, ("view_user", "change_user", "delete_user"), instance)
+        ObjectPermission.objects.grant(instance, ("change_menu",), profile.bookmarks)
+        ObjectPermission.objects.grant(instance, ("change_region",), profile.dashboard)
 
-        can_view_this_user.users.add(instance)
-        can_change_this_user.users.add(instance)
-        can_delete_this_user.users.add(instance)
-        can_change_user_bookmarks.users.add(instance)
-        can_change_user_dashboard.users.add(instance)
+        link_perms = MyPermission.objects.get_ids_for_model(Link, ("view_link", "add_link"))
+        widget_perms = MyPermission.objects.get_ids_for_model(Widget, ("view_widget", "add_widget"))
 
-        can_view_bookmark, is_new = MyPermission.objects.get_or_create_by_natural_key("view_link", "menus", "link")
-        can_add_bookmark, is_new = MyPermission.objects.get_or_create_by_natural_key("add_link", "menus", "link")
-        can_view_widget, is_new = MyPermission.objects.get_or_create_by_natural_key("view_widget", "widgets", "widget")
-        can_add_widget, is_new = MyPermission.objects.get_or_create_by_natural_key("add_widget", "widgets", "widget")
-
-        instance.user_permissions.add(can_view_bookmark, can_add_bookmark, can_view_widget, can_add_widget)
+        instance.user_permissions.add(*(link_perms + widget_perms))
 
 def update_author_permissions(sender, instance, *args, **kwargs):
     """Updates the permissions assigned to the author of the given object.
     """
+    if not kwargs.get('created', True):
+        return
+
     author = LoggedInUserCache().current_user
-    content_type = ContentType.objects.get_for_model(sender)
-    app_label = content_type.app_label
-    model_name = content_type.model
 
     if author:
-        can_view_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_%s" % model_name, app_label, model_name, instance.pk)
-        can_change_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_%s" % model_name, app_label, model_name, instance.pk)
-        can_delete_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("delete_%s" % model_name, app_label, model_name, instance.pk)
+        model_name = ContentType.objects.get_for_model(sender).model
+        ObjectPermission.objects.grant(author, ("view_%s" % model_name, "change_%s" % model_name, "delete_%s" % model_name), instance)
+
+def invalidate_user_object_permissions(sender, instance, action, reverse, model, pk_set, *args, **kwargs):
+    """Invalidates the cached object permissions of the users granted or revoked.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        permission_cache.invalidate(instance.pk)
+    elif pk_set is None:
+        permission_cache.invalidate()
+    else:
+        for pk in pk_set:
+            permission_cache.invalidate(pk)
+
+def invalidate_group_object_permissions(sender, instance, action, *args, **kwargs):
+    """Invalidates the cached object permissions of all users.
+
+    Group grants can involve any number of users, so everything is invalidated.
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        permission_cache.invalidate()
 
-        can_view_this_object.users.add(author)
-        can_change_this_object.users.add(author)
-        can_delete_this_object.users.add(author)
+def invalidate_group_members_permissions(sender, instance, action, reverse, model, pk_set, *args, **kwargs):
+    """Invalidates the cached object permissions of the users joining or leaving a group.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        permission_cache.invalidate(instance.pk)
+    elif pk_set is None:
+        permission_cache.invalidate()
+    else:
+        for pk in pk_set:
+            permission_cache.invalidate(pk)
+
+def invalidate_deleted_object_permission(sender, instance, *args, **kwargs):
+    """Invalidates the cached object permissions affected by a deleted object permission.
+    """
+    if instance.groups.exists():
+        permission_cache.invalidate()
+    else:
+        for pk in instance.users.values_list('pk', flat=True):
+            permission_cache.invalidate(pk)
+
+def refresh_anonymous_user(sender, instance, *args, **kwargs):
+    """Reloads the anonymous user when it's changed or deleted.
+    """
+    if instance.pk == getattr(settings, 'ANONYMOUS_USER_ID', None):
+        reset_anonymous_user()
+
+def forget_permission_ids(sender, instance, *args, **kwargs):
+    """Drops the resolved permission IDs when a permission is changed or deleted.
+    """
+    reset_permission_ids()
 
 ## CONNECTIONS ##
 
 models.signals.post_save.connect(user_post_save, User)
 
+post_save.connect(refresh_anonymous_user, User, dispatch_uid="refresh_anonymous_user")
+post_save.connect(refresh_anonymous_user, MyUser, dispatch_uid="refresh_anonymous_myuser")
+post_delete.connect(refresh_anonymous_user, User, dispatch_uid="refresh_deleted_anonymous_user")
+post_delete.connect(refresh_anonymous_user, MyUser, dispatch_uid="refresh_deleted_anonymous_myuser")
+
+post_save.connect(forget_permission_ids, Permission, dispatch_uid="forget_saved_permission_ids")
+post_delete.connect(forget_permission_ids, Permission, dispatch_uid="forget_deleted_permission_ids")
+
+m2m_changed.connect(invalidate_user_object_permissions, ObjectPermission.users.through, dispatch_uid="invalidate_user_object_permissions")
+m2m_changed.connect(invalidate_group_object_permissions, ObjectPermission.groups.through, dispatch_uid="invalidate_group_object_permissions")
+m2m_changed.connect(invalidate_group_members_permissions, User.groups.through, dispatch_uid="invalidate_group_members_permissions")
+pre_delete.connect(invalidate_deleted_object_permission, ObjectPermission, dispatch_uid="invalidate_deleted_object_permission")
+
 post_save.connect(update_author_permissions, Link, dispatch_uid="update_link_permissions")
 post_save.connect(update_author_permissions, Bookmark, dispatch_uid="update_bookmark_permissions")
 post_save.connect(update_author_permissions, Widget, dispatch_uid="update_widget_permissions")
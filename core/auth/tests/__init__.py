@@ -22,3 +22,7 @@ __version__ = '0.0.5'
 
 from prometeo.core.auth.tests.models import *
 from prometeo.core.auth.tests.backends import *
+from prometeo.core.auth.tests.managers import *
+from prometeo.core.auth.tests.cache import *
+from prometeo.core.auth.tests.context_processors import *
+from prometeo.core.auth.tests.decorators import *
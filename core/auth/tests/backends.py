@@ -20,18 +20,21 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.utils import unittest
+from django.test import TestCase
+from django.contrib.auth.models import Group, AnonymousUser
+from django.conf import settings
 
 from prometeo.core.auth.backends import *
+from prometeo.core.auth.cache import permission_cache
 
-class ObjectPermissionBackendTestCase(unittest.TestCase):
+class ObjectPermissionBackendTestCase(TestCase):
     def test_has_perm(self):
         b = ObjectPermissionBackend()
         p = Permission.objects.get_by_natural_key("delete_user", "auth", "user")
         p_name = "auth.delete_user"
-        u = User.objects.get(username="u")
-        u1 = User.objects.get(username="u1")
-        u2 = User.objects.get(username="u2")
+        u = MyUser.objects.create(username="u", password="test", email="u@test.it")
+        u1 = MyUser.objects.create(username="u1", password="test", email="u1@test.it")
+        u2 = MyUser.objects.create(username="u2", password="test", email="u2@test.it")
         u1.user_permissions.add(p)
         op = ObjectPermission.objects.create(object_id=u.pk, perm=p)
         op.users.add(u2)
@@ -41,3 +44,58 @@ class ObjectPermissionBackendTestCase(unittest.TestCase):
         self.assertFalse(b.has_perm(u, p_name, u))
         self.assertTrue(b.has_perm(u2, p_name, u))
         self.assertFalse(b.has_perm(u, p_name, u))
+
+    def test_permission_cache(self):
+        b = ObjectPermissionBackend()
+        p = Permission.objects.get_by_natural_key("change_user", "auth", "user")
+        u = User.objects.create(username="cu", password="test", email="cu@test.it")
+        u1 = User.objects.create(username="cu1", password="test", email="cu1@test.it")
+        op, is_new = ObjectPermission.objects.get_or_create(object_id=u.pk, perm=p)
+        self.assertFalse(b.has_perm(User.objects.get(pk=u1.pk), p, u))
+        hits = permission_cache.hits
+        self.assertFalse(b.has_perm(User.objects.get(pk=u1.pk), p, u))
+        self.assertEqual(permission_cache.hits, hits + 1)
+        op.users.add(u1)
+        self.assertTrue(b.has_perm(User.objects.get(pk=u1.pk), p, u))
+        op.users.remove(u1)
+        self.assertFalse(b.has_perm(User.objects.get(pk=u1.pk), p, u))
+        g = Group.objects.create(name="cache")
+        op.groups.add(g)
+        u1.groups.add(g)
+        self.assertTrue(b.has_perm(User.objects.get(pk=u1.pk), p, u))
+
+    def test_anonymous_user(self):
+        b = ObjectPermissionBackend()
+        p = Permission.objects.get_by_natural_key("view_user", "auth", "user")
+        u = User.objects.create(username="au", password="test", email="au@test.it")
+        anonymous = User.objects.create(username="anonymous", password="test", email="anonymous@test.it")
+        settings.ANONYMOUS_USER_ID = anonymous.pk
+        try:
+            reset_anonymous_user()
+            self.assertFalse(b.has_perm(AnonymousUser(), p, u))
+            cached_user = get_anonymous_user()
+            self.assertTrue(get_anonymous_user() is cached_user)
+            ObjectPermission.objects.grant(anonymous, "view_user", u)
+            self.assertTrue(b.has_perm(AnonymousUser(), p, u))
+            self.assertTrue(get_anonymous_user() is cached_user)
+        finally:
+            del settings.ANONYMOUS_USER_ID
+            reset_anonymous_user()
+        self.assertFalse(b.has_perm(AnonymousUser(), p, u))
+
+class ObjectPermissionIndexTestCase(TestCase):
+    def test_lookup(self):
+        index = ObjectPermissionIndex([("auth", "change_user", 3), ("auth", "change_user", 1), ("auth", "view_user", 2), ("auth", "change_user", 3)])
+        self.assertTrue(index.has_perm("auth.change_user", 1))
+        self.assertTrue(index.has_perm("auth.change_user", 3))
+        self.assertFalse(index.has_perm("auth.change_user", 2))
+        self.assertFalse(index.has_perm("auth.delete_user", 1))
+        self.assertEqual(list(index.get_object_ids("auth.change_user")), [1, 3])
+
+    def test_string_view(self):
+        index = ObjectPermissionIndex([("auth", "change_user", 1), ("auth", "view_user", 2)])
+        self.assertTrue("auth.change_user.1" in index)
+        self.assertFalse("auth.change_user.2" in index)
+        self.assertFalse("auth.change_user" in index)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(set(index), set([u"auth.change_user.1", u"auth.view_user.2"]))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import threading
+from StringIO import StringIO
+
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from prometeo.core.auth.cache import LoggedInUserCache, ObjectPermissionCache
+
+class LoggedInUserCacheTestCase(TestCase):
+    def test_thread_local_user(self):
+        u, created = User.objects.get_or_create(username="logged_in_user")
+        cache = LoggedInUserCache()
+        cache.user = u
+        seen = []
+        t = threading.Thread(target=lambda: seen.append(LoggedInUserCache().current_user))
+        t.start()
+        t.join()
+        self.assertEqual(seen, [None])
+        self.assertEqual(cache.current_user, u)
+        self.assertEqual(cache.has_user, True)
+        cache.clear()
+        self.assertEqual(cache.has_user, False)
+
+class ObjectPermissionCacheTestCase(TestCase):
+    def test_shared_stats(self):
+        cache = ObjectPermissionCache()
+        cache.stats_name = "objperms:test"
+        cache.reset_shared_stats()
+        cache.get(-1)
+        cache.get(-1, lambda: [])
+        cache.get(-1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'ratio': 1.0 / 3})
+        self.assertEqual(cache.shared_stats(), cache.stats())
+        out = StringIO()
+        call_command('cachestats', stdout=out)
+        self.assertTrue("Object permissions" in out.getvalue())
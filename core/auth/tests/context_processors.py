@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from prometeo.core.auth.models import ObjectPermission
+from prometeo.core.auth.context_processors import *
+
+class ObjPermWrapperTestCase(TestCase):
+    def test_lookup(self):
+        u = User.objects.create(username="cpu", password="test", email="cpu@test.it")
+        u1 = User.objects.create(username="cpu1", password="test", email="cpu1@test.it")
+        u2 = User.objects.create(username="cpu2", password="test", email="cpu2@test.it")
+        ObjectPermission.objects.grant(u, "change_user", u1)
+        obj_perms = ObjPermWrapper(User.objects.get(pk=u.pk))
+        self.assertTrue(u1.pk in obj_perms['auth']['change_user'])
+        self.assertTrue(str(u1.pk) in obj_perms['auth']['change_user'])
+        self.assertFalse(u2.pk in obj_perms['auth']['change_user'])
+        self.assertFalse(u1.pk in obj_perms['auth']['delete_user'])
+        self.assertEqual(list(obj_perms['auth']['change_user']), [u.pk, u1.pk])
+        self.assertTrue(obj_perms['auth'])
+        self.assertFalse(obj_perms['projects'])
+
+    def test_superuser(self):
+        su = User.objects.create(username="cpsu", password="test", email="cpsu@test.it", is_superuser=True)
+        obj_perms = ObjPermWrapper(su)
+        self.assertTrue(12345 in obj_perms['auth']['change_user'])
+        self.assertTrue(obj_perms['projects'])
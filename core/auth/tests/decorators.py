@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.test import TestCase
+from django.test.client import Client
+from django.http import HttpRequest
+from django.db import connection
+from django.conf import settings
+
+from prometeo.core.auth.models import *
+from prometeo.core.auth.decorators import get_cached_obj
+
+class GetCachedObjTestCase(TestCase):
+    def test_memoized_by_arguments(self):
+        calls = []
+        def get_obj(request, *args, **kwargs):
+            calls.append(kwargs)
+            return kwargs.get('id')
+        request = HttpRequest()
+        self.assertEqual(get_cached_obj(request, get_obj, id=1), 1)
+        self.assertEqual(get_cached_obj(request, get_obj, id=1), 1)
+        self.assertEqual(get_cached_obj(request, get_obj, id=2), 2)
+        self.assertEqual(len(calls), 2)
+
+    def test_detail_view_fetches_once(self):
+        u = MyUser.objects.create(username="cou", email="cou@test.it")
+        u.set_password("test")
+        u.save()
+        client = Client()
+        client.login(username="cou", password="test")
+        settings.DEBUG = True
+        try:
+            connection.queries = []
+            response = client.get("/users/cou/")
+            fetches = [q for q in connection.queries if 'FROM "auth_user"' in q['sql'] and '"auth_user"."username" = cou' in q['sql']]
+        finally:
+            settings.DEBUG = False
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(fetches), 1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.test import TestCase
+from django.test.client import Client
+from django.contrib.auth.models import User, Group
+
+from prometeo.core.auth.models import *
+
+class VisibilityManagerTestCase(TestCase):
+    def test_visible_to(self):
+        p = Permission.objects.get_by_natural_key("view_user", "auth", "user")
+        u = MyUser.objects.create(username="vu", password="test", email="vu@test.it")
+        u1 = MyUser.objects.create(username="vu1", password="test", email="vu1@test.it")
+        u2 = MyUser.objects.create(username="vu2", password="test", email="vu2@test.it")
+        op, is_new = ObjectPermission.objects.get_or_create(object_id=u.pk, perm=p)
+        op.users.add(u1)
+        visible = MyUser.objects.visible_to(u1)
+        self.assertTrue(u in visible)
+        self.assertFalse(u2 in visible)
+        self.assertFalse(u1 in MyUser.objects.visible_to(u2))
+
+    def test_visible_to_groups(self):
+        p = Permission.objects.get_by_natural_key("change_user", "auth", "user")
+        g = Group.objects.create(name="visibility")
+        u = MyUser.objects.create(username="vgu", password="test", email="vgu@test.it")
+        u1 = MyUser.objects.create(username="vgu1", password="test", email="vgu1@test.it")
+        op, is_new = ObjectPermission.objects.get_or_create(object_id=u.pk, perm=p)
+        op.groups.add(g)
+        self.assertFalse(u in MyUser.objects.visible_to(u1, 'change'))
+        u1.groups.add(g)
+        self.assertTrue(u in MyUser.objects.visible_to(u1, 'change'))
+
+    def test_visible_to_superuser(self):
+        s = MyUser.objects.create(username="vsu", password="test", email="vsu@test.it", is_superuser=True)
+        self.assertEqual(MyUser.objects.visible_to(s).count(), MyUser.objects.count())
+
+    def test_list_view_filters_by_object_permissions(self):
+        p = Permission.objects.get_by_natural_key("view_user", "auth", "user")
+        u = MyUser.objects.create(username="vlu", password="test", email="vlu@test.it")
+        u1 = MyUser.objects.create(username="vlu1", email="vlu1@test.it")
+        u2 = MyUser.objects.create(username="vlu2", password="test", email="vlu2@test.it")
+        u1.set_password("test")
+        u1.save()
+        op, is_new = ObjectPermission.objects.get_or_create(object_id=u.pk, perm=p)
+        op.users.add(u1)
+        client = Client()
+        client.login(username="vlu1", password="test")
+        self.assertEqual(client.get("/users/").status_code, 302)
+        u1.user_permissions.add(p)
+        response = client.get("/users/")
+        self.assertEqual(response.status_code, 200)
+        object_ids = [o.pk for o in response.context['object_list']]
+        self.assertTrue(u.pk in object_ids)
+        self.assertFalse(u2.pk in object_ids)
+
+class ObjectPermissionManagerTestCase(TestCase):
+    def test_grant(self):
+        u = MyUser.objects.create(username="gu", password="test", email="gu@test.it")
+        u1 = MyUser.objects.create(username="gu1", password="test", email="gu1@test.it")
+        u2 = MyUser.objects.create(username="gu2", password="test", email="gu2@test.it")
+        ObjectPermission.objects.grant([u1, u2.pk], ("view_user", "change_user"), u)
+        ObjectPermission.objects.grant(u1, ("view_user", "change_user"), [u, u2])
+        for user in (u1, u2):
+            self.assertTrue(User.objects.get(pk=user.pk).has_perm("auth.view_user", u))
+            self.assertTrue(User.objects.get(pk=user.pk).has_perm("auth.change_user", u))
+            self.assertFalse(User.objects.get(pk=user.pk).has_perm("auth.delete_user", u))
+        self.assertTrue(User.objects.get(pk=u1.pk).has_perm("auth.change_user", u2))
+        self.assertFalse(User.objects.get(pk=u2.pk).has_perm("auth.change_user", u2))
+        self.assertEqual(ObjectPermission.objects.filter(object_id=u.pk, perm__codename="view_user").count(), 1)
+        self.assertEqual(ObjectPermission.objects.get(object_id=u.pk, perm__codename="view_user").users.count(), 2)
+
+    def test_grant_recreated_permission(self):
+        u = MyUser.objects.create(username="gru", password="test", email="gru@test.it")
+        u1 = MyUser.objects.create(username="gru1", password="test", email="gru1@test.it")
+        perm_id, = MyPermission.objects.get_ids_for_model(MyUser, ("archive_user",))
+        Permission.objects.get(pk=perm_id).delete()
+        MyPermission.objects.get_ids_for_model(MyUser, ("restore_user",))
+        ObjectPermission.objects.grant(u1, "archive_user", u)
+        op = ObjectPermission.objects.get(object_id=u.pk, perm__codename="archive_user")
+        self.assertEqual(list(op.users.values_list("pk", flat=True)), [u1.pk])
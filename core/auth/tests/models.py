@@ -20,12 +20,13 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.utils import unittest
+from django.test import TestCase
+from django.db.models.signals import post_save
 from django.contrib.auth.models import User
 
 from prometeo.core.auth.models import *
 
-class MyUserTestCase(unittest.TestCase):
+class MyUserTestCase(TestCase):
     def test_proxy(self):
         u = MyUser.objects.create(username="u", password="test", email="u@test.it")
         self.assertEqual(isinstance(u, MyUser), True)
@@ -37,3 +38,19 @@ class MyUserTestCase(unittest.TestCase):
         u2 = MyUser.objects.create(username="u2", password="test", first_name="John", last_name="Doe", email="u2@test.it")
         self.assertEqual(u2.full_name, "John Doe")
         self.assertEqual(u2.full_name, u2.get_full_name())
+
+class UserProfileTestCase(TestCase):
+    def test_provisioning(self):
+        saves = []
+        def count_saves(sender, instance, **kwargs):
+            saves.append(instance.pk)
+        post_save.connect(count_saves, UserProfile, dispatch_uid="count_profile_saves")
+        try:
+            u = User.objects.create(username="provisioned", password="test", email="provisioned@test.it")
+        finally:
+            post_save.disconnect(count_saves, UserProfile, dispatch_uid="count_profile_saves")
+        profile = UserProfile.objects.get(user=u)
+        self.assertEqual(saves, [profile.pk])
+        self.assertEqual(profile.bookmarks.slug, "userprofile_%d_bookmarks" % profile.pk)
+        self.assertEqual(profile.dashboard.slug, "userprofile_%d_dashboard" % profile.pk)
+        self.assertEqual(profile.calendar.slug, "userprofile_%d_calendar" % profile.pk)
@@ -31,8 +31,8 @@ from django.contrib.comments.models import *
 from django.contrib import messages
 from django.conf import settings
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail, set_language
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail, set_language
 
 from models import *
 from forms import *
@@ -51,7 +51,7 @@ def _adapt_form(request, form):
 
 def _get_user(request, *args, **kwargs):
     username = kwargs.get('username', None)
-    return get_object_or_404(User, username=username)
+    return get_object_or_404(MyUser, username=username)
 
 def _get_comment(request, *args, **kwargs):
     id = kwargs.get('id', None)
@@ -69,7 +69,7 @@ def user_list(request, page=0, paginate_by=10, **kwargs):
     """
     return filtered_list_detail(
         request,
-        MyUser.objects.all(),
+        MyUser.objects.visible_to(request.user),
         fields=['username', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser', 'last_login'],
         paginate_by=paginate_by,
         page=page,
@@ -81,12 +81,11 @@ def user_list(request, page=0, paginate_by=10, **kwargs):
 def user_detail(request, username, **kwargs):
     """Displays a user's profile.
     """
+    user = get_cached_obj(request, _get_user, username=username, **kwargs)
     object_list = MyUser.objects.all()
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        slug=username,
-        slug_field='username',
-        queryset=object_list,
+        user,
         template_name='auth/user_detail.html',
         extra_context={'object_list': object_list},
         **kwargs
@@ -115,7 +114,7 @@ def user_add(request, **kwargs):
 def user_edit(request, username, **kwargs):
     """Edits a user's profile.
     """
-    user = get_object_or_404(User, username=username)
+    user = get_cached_obj(request, _get_user, username=username, **kwargs)
         
     if request.method == 'POST':
         form = UserEditForm(request.POST, instance=user)
@@ -139,7 +138,7 @@ def user_edit(request, username, **kwargs):
 def user_delete(request, username, **kwargs):
     """Deletes a user's profile.
     """ 
-    user = get_object_or_404(User, username=username)
+    user = get_cached_obj(request, _get_user, username=username, **kwargs)
         
     if request.method == 'POST' and user == request.user:
         logout(request)
@@ -158,7 +157,7 @@ def user_delete(request, username, **kwargs):
 def comment_delete(request, id, **kwargs):
     """Deletes a user's comment.
     """ 
-    comment = get_object_or_404(Comment, id=id, site__pk=settings.SITE_ID)
+    comment = get_cached_obj(request, _get_comment, id=id, **kwargs)
     return create_update.delete_object(
             request,
             model=Comment,
@@ -23,6 +23,7 @@ __version__ = '0.0.5'
 from django.utils.translation import ugettext_noop as _
 from django.db.models.signals import post_save, post_delete, m2m_changed
 
+from prometeo.core.utils import register_provisioner
 from prometeo.core.auth.models import *
 from prometeo.core.auth.signals import *
 from prometeo.core.notifications.signals import *
@@ -34,35 +35,34 @@ from models import *
 def manage_calendar(cls):
     """Connects handlers for calendar management.
     """
-    models.signals.post_save.connect(create_calendar, cls)
+    register_provisioner(cls, "calendar", allocate_calendar)
     models.signals.post_delete.connect(delete_calendar, cls)
 
+def allocate_calendar(sender, instance):
+    """Returns a new (empty) calendar for the given object.
+    """
+    calendar, is_new = Calendar.objects.get_or_create(
+        title="%s's calendar" % instance,
+        slug="%s_%d_calendar" % (sender.__name__.lower(), instance.pk),
+        description=_("Calendar for %s") % instance
+    )
+    if not is_new:
+        for e in calendar.events.all():
+            e.delete()
+    return calendar
+
 ## HANDLERS ##
 
-def update_attendees_event_permissions(sender, instance, *args, **kwargs):
+def update_attendees_event_permissions(sender, instance, action, reverse, model, pk_set, *args, **kwargs):
     """Updates the permissions assigned to the attendees of the given event.
     """
-    can_view_this_event, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_event", "calendar", "event", instance.pk)
-    can_change_this_event, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_event", "calendar", "event", instance.pk)
+    if action != "post_add":
+        return
 
-    for att in instance.attendees.all():
-        can_view_this_event.users.add(att)
-        can_change_this_event.users.add(att)
-
-def create_calendar(sender, instance, *args, **kwargs):
-    """Updates the calendar field of the object's stream.
-    """
-    if hasattr(instance, "calendar") and not instance.calendar:
-        calendar, is_new = Calendar.objects.get_or_create(
-            title="%s's calendar" % instance,
-            slug="%s_%d_calendar" % (sender.__name__.lower(), instance.pk),
-            description=_("Calendar for %s") % instance
-        )
-        if not is_new:
-            for e in calendar.events.all():
-                e.delete()
-        instance.calendar = calendar
-        instance.save()
+    if reverse:
+        ObjectPermission.objects.grant(instance, ("view_event", "change_event"), Event.objects.filter(pk__in=pk_set))
+    else:
+        ObjectPermission.objects.grant(pk_set, ("view_event", "change_event"), instance)
 
 def delete_calendar(sender, instance, *args, **kwargs):
     """Deletes the calendar of the given object.
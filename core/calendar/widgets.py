@@ -22,6 +22,10 @@ __version__ = '0.0.5'
 
 from datetime import date
 
+from prometeo.core.widgets.loading import registry
+
+from models import Event
+
 def latest_events(context):
     """The list of latest events.
     """
@@ -39,3 +43,6 @@ def today_events(context):
     request = context['request']
     context['object_list'] = request.user.get_profile().calendar.event_set.filter(start__startswith=date.today())
     return context
+
+registry.register_dependencies(latest_events, Event)
+registry.register_dependencies(today_events, Event)
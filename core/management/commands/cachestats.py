@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from prometeo.core.auth.cache import permission_cache
+from prometeo.core.widgets.loading import registry
+
+class Command(NoArgsCommand):
+    help = "Reports the hits and misses of the object permission and widget caches."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--reset', action='store_true', dest='reset', default=False,
+            help='Resets the counters after reporting them.'),
+    )
+
+    def handle_noargs(self, **options):
+        for name, source in (("Object permissions", permission_cache), ("Widget fragments", registry)):
+            stats = source.shared_stats()
+            self.stdout.write("%s: %d hits, %d misses (%.1f%% hit ratio)\n" % (name, stats['hits'], stats['misses'], stats['ratio'] * 100))
+            if options.get('reset'):
+                source.reset_shared_stats()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import os
+import time
+import socket
+from optparse import make_option
+
+from django.db import reset_queries
+from django.core.management.base import NoArgsCommand
+
+from prometeo.core.models import Job
+
+class Command(NoArgsCommand):
+    help = "Runs the queued jobs."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', action='store', type='int', dest='batch_size', default=None,
+            help='Max number of jobs claimed at once (default: JOB_BATCH_SIZE).'),
+        make_option('--sleep', action='store', type='float', dest='sleep', default=1.0,
+            help='Seconds to wait when the queue is empty.'),
+        make_option('--once', action='store_true', dest='once', default=False,
+            help='Exits as soon as the queue is empty.'),
+    )
+
+    def handle_noargs(self, **options):
+        worker = "%s:%d" % (socket.gethostname(), os.getpid())
+        batch_size = options.get('batch_size')
+        verbosity = int(options.get('verbosity', 1))
+
+        try:
+            while True:
+                reset_queries()
+                jobs = Job.objects.claim(worker, batch_size)
+                for job in jobs:
+                    if not job.run() and verbosity > 0:
+                        self.stderr.write("Job %d (%s) failed [attempt %d].\n" % (job.pk, job.name, job.attempts))
+                if not jobs:
+                    if options.get('once'):
+                        break
+                    time.sleep(options.get('sleep'))
+        except KeyboardInterrupt:
+            pass
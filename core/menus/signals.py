@@ -24,26 +24,26 @@ from django.db import models
 from django.utils.translation import ugettext_noop as _
 import django.dispatch
 
+from prometeo.core.utils import register_provisioner
+
 from models import *
 
 ## UTILS ##
 
 def manage_bookmarks(cls):
-    models.signals.post_save.connect(create_bookmarks, cls)
+    register_provisioner(cls, "bookmarks", allocate_bookmarks)
     models.signals.post_delete.connect(delete_bookmarks, cls)
 
-## HANDLERS ##
-
-def create_bookmarks(sender, instance, *args, **kwargs):
-    """Creates a new bookmarks list for the given object.
+def allocate_bookmarks(sender, instance):
+    """Returns a new (empty) bookmarks list for the given object.
     """
-    if hasattr(instance, "bookmarks") and not instance.bookmarks:
-        bookmarks, is_new = Menu.objects.get_or_create(slug="%s_%d_bookmarks" % (sender.__name__.lower(), instance.pk), description=_("Bookmarks"))
-        if not is_new:
-            for l in bookmarks.links.all():
-                l.delete()
-        instance.bookmarks = bookmarks
-        instance.save()
+    bookmarks, is_new = Menu.objects.get_or_create(slug="%s_%d_bookmarks" % (sender.__name__.lower(), instance.pk), description=_("Bookmarks"))
+    if not is_new:
+        for l in bookmarks.links.all():
+            l.delete()
+    return bookmarks
+
+## HANDLERS ##
 
 def delete_bookmarks(sender, instance, *args, **kwargs):
     """Deletes the bookmarks list of the given object.
@@ -0,0 +1,49 @@
+# encoding: utf-8
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        
+        # Adding model 'Job'
+        db.create_table('core_job', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=200)),
+            ('arguments', self.gf('django.db.models.fields.TextField')(default='{}')),
+            ('status', self.gf('django.db.models.fields.CharField')(default='PENDING', max_length=10, db_index=True)),
+            ('attempts', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+            ('run_after', self.gf('django.db.models.fields.DateTimeField')(default=datetime.datetime.now, db_index=True)),
+            ('worker', self.gf('django.db.models.fields.CharField')(max_length=150, null=True, blank=True)),
+            ('locked_at', self.gf('django.db.models.fields.DateTimeField')(null=True, blank=True)),
+            ('error', self.gf('django.db.models.fields.TextField')(null=True, blank=True)),
+            ('created', self.gf('django.db.models.fields.DateTimeField')(auto_now_add=True, blank=True)),
+        ))
+        db.send_create_signal('core', ['Job'])
+
+
+    def backwards(self, orm):
+        
+        # Deleting model 'Job'
+        db.delete_table('core_job')
+
+
+    models = {
+        'core.job': {
+            'Meta': {'ordering': "('run_after', 'id')", 'object_name': 'Job'},
+            'arguments': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            'attempts': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'error': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'locked_at': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'run_after': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now', 'db_index': 'True'}),
+            'status': ('django.db.models.fields.CharField', [], {'default': "'PENDING'", 'max_length': '10', 'db_index': 'True'}),
+            'worker': ('django.db.models.fields.CharField', [], {'max_length': '150', 'null': 'True', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['core']
@@ -21,8 +21,13 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 import json
+import uuid
+import traceback
+from datetime import datetime, timedelta
 
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
+from django.utils.importlib import import_module
 from django.db.models.signals import pre_delete
 from django.db.models.fields import FieldDoesNotExist
 from django.contrib.comments.models import Comment
@@ -66,6 +71,134 @@ class Commentable(models.Model):
     class Meta:
         abstract=True
 
+class JobManager(models.Manager):
+    """Manager for queued jobs.
+    """
+    def enqueue(self, func, *args, **kwargs):
+        """Queues a call of "func" with the given (JSON serializable) arguments.
+
+        "func" must be a module-level function. If JOB_QUEUE_EAGER is True,
+        the function is called immediately instead, within the transaction of
+        the caller.
+        """
+        job = self.model(
+            name="%s.%s" % (func.__module__, func.__name__),
+            arguments=json.dumps({'args': args, 'kwargs': kwargs})
+        )
+        if getattr(settings, 'JOB_QUEUE_EAGER', False):
+            job.call()
+            return None
+        job.save()
+        return job
+
+    def claim(self, worker, limit=None):
+        """Locks up to "limit" runnable jobs for the given worker and returns them.
+
+        Jobs locked by a worker for more than JOB_LOCK_TIMEOUT seconds are
+        considered abandoned and can be claimed again.
+        """
+        limit = limit or getattr(settings, 'JOB_BATCH_SIZE', 50)
+        now = datetime.now()
+        expired = now - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 300))
+        runnable = self.filter(
+            models.Q(status='PENDING', run_after__lte=now) |
+            models.Q(status='RUNNING', locked_at__lt=expired)
+        )
+        ids = list(runnable.order_by('run_after', 'id').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Each claim gets its own token, so jobs claimed by another worker in
+        # the meantime are skipped.
+        token = "%s:%s" % (worker, uuid.uuid4().hex)
+        runnable.filter(id__in=ids).update(status='RUNNING', worker=token, locked_at=now)
+        return list(self.filter(id__in=ids, status='RUNNING', worker=token).order_by('run_after', 'id'))
+
+    def run_pending(self, worker="inline", limit=None):
+        """Runs all the runnable jobs, in batches. Returns the number of jobs run.
+        """
+        count = 0
+        jobs = self.claim(worker, limit)
+        while jobs:
+            for job in jobs:
+                job.run()
+                count += 1
+            jobs = self.claim(worker, limit)
+        return count
+
+class Job(models.Model):
+    """A call to a function queued to be run by a worker process.
+    """
+    name = models.CharField(_('name'), max_length=200)
+    arguments = models.TextField(_('arguments'), default='{}', validators=[validate_json])
+    status = models.CharField(_('status'), max_length=10, choices=settings.JOB_STATUS_CHOICES, default='PENDING', db_index=True)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    run_after = models.DateTimeField(_('run after'), default=datetime.now, db_index=True)
+    worker = models.CharField(_('worker'), max_length=150, blank=True, null=True)
+    locked_at = models.DateTimeField(_('locked at'), blank=True, null=True)
+    error = models.TextField(_('error'), blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('created'))
+
+    objects = JobManager()
+
+    class Meta:
+        verbose_name = _('job')
+        verbose_name_plural = _('jobs')
+        ordering = ('run_after', 'id')
+
+    def __unicode__(self):
+        return self.name
+
+    def call(self):
+        """Calls the queued function with the queued arguments.
+        """
+        module_name, sep, func_name = self.name.rpartition('.')
+        func = getattr(import_module(module_name), func_name)
+        arguments = json.loads(self.arguments)
+        kwargs = dict([(str(k), v) for k, v in arguments.get('kwargs', {}).items()])
+        return func(*arguments.get('args', []), **kwargs)
+
+    def execute(self):
+        """Calls the queued function in its own transaction.
+
+        If the function fails, everything it wrote is rolled back, so a retry
+        starts from a clean state.
+        """
+        @transaction.commit_manually
+        def call():
+            try:
+                result = self.call()
+            except:
+                transaction.rollback()
+                raise
+            transaction.commit()
+            return result
+
+        return call()
+
+    def run(self):
+        """Runs the job, deleting it on success or scheduling a retry on failure.
+
+        After JOB_MAX_ATTEMPTS failures the job is marked as failed and kept
+        for inspection.
+        """
+        try:
+            self.execute()
+        except Exception:
+            self.attempts += 1
+            self.error = traceback.format_exc()
+            self.worker = None
+            self.locked_at = None
+            if self.attempts < getattr(settings, 'JOB_MAX_ATTEMPTS', 5):
+                self.status = 'PENDING'
+                delay = getattr(settings, 'JOB_RETRY_DELAY', 60) * 2 ** (self.attempts - 1)
+                self.run_after = datetime.now() + timedelta(seconds=delay)
+            else:
+                self.status = 'FAILED'
+            self.save()
+            return False
+        self.delete()
+        return True
+
 @receiver(pre_delete)
 def delete_comments(sender, **kwargs):
     """Deletes all associated comments.
@@ -31,5 +31,9 @@ class SignatureAdmin(admin.ModelAdmin):
 class StreamAdmin(admin.ModelAdmin):
     pass
 
+class EmailPreferenceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'digest')
+
 admin.site.register(Signature, SignatureAdmin)
 admin.site.register(Stream, StreamAdmin)
+admin.site.register(EmailPreference, EmailPreferenceAdmin)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from models import NotificationCounter
+
+def unread_notifications(request):
+    """Adds the number of unread notifications of the current user.
+
+    The counter is read only if the template uses it.
+    """
+    cache = {}
+    def count():
+        if 'unread' not in cache:
+            cache['unread'] = NotificationCounter.objects.unread(request.user)
+        return cache['unread']
+
+    if not request.user.is_authenticated():
+        return {}
+
+    return {
+        'unread_notifications': count,
+    }
@@ -21,11 +21,13 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 from django.core.urlresolvers import reverse
+from django.db import connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
 from django.db.models.signals import post_syncdb
 from django.utils.translation import ugettext_noop as _
 
 from prometeo.core.auth.models import MyPermission
 from prometeo.core.menus.models import *
+from prometeo.core.notifications.models import TimelineEntry
 from prometeo.core.utils import check_dependency
 
 check_dependency('prometeo.core.menus')
@@ -42,9 +44,44 @@ def install(sender, **kwargs):
         menu=user_profile_menu
     )
 
+    user_profile_timeline_link, is_new = Link.objects.get_or_create(
+        title=_("Timeline"),
+        slug="user_profile_timeline",
+        url="{% url timeline object.username %}",
+        menu=user_profile_menu
+    )
+
     # Permissions.
     can_view_notification, is_new = MyPermission.objects.get_or_create_by_natural_key("view_notification", "notifications", "notification")
 
     user_profile_notifications_link.only_with_perms.add(can_view_notification)
 
+def create_indexes(sender, created_models=[], **kwargs):
+    """Creates the composite indexes which can't be declared on the models.
+
+    The (user, created, id) index of timeline entries serves the keyset
+    pagination of timelines. Databases managed by South get it from the
+    migrations instead.
+    """
+    if sender.__name__ != TimelineEntry.__module__ or TimelineEntry not in created_models:
+        return
+
+    db = kwargs.get('db', DEFAULT_DB_ALIAS)
+    qn = connections[db].ops.quote_name
+    opts = TimelineEntry._meta
+    columns = [opts.get_field(f).column for f in ('user', 'created', 'id')]
+    cursor = connections[db].cursor()
+    try:
+        cursor.execute("CREATE INDEX %s ON %s (%s)" % (
+            qn("%s_%s" % (opts.db_table, "_".join(columns))),
+            qn(opts.db_table),
+            ", ".join([qn(c) for c in columns]),
+        ))
+    except DatabaseError:
+        # "flush" sends "post_syncdb" again, when the index already exists.
+        transaction.rollback_unless_managed(using=db)
+    else:
+        transaction.commit_unless_managed(using=db)
+
 post_syncdb.connect(install, dispatch_uid="install_notifications")
+post_syncdb.connect(create_indexes, dispatch_uid="create_notifications_indexes")
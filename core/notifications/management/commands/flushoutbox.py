@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import os
+import socket
+from optparse import make_option
+
+from django.core.mail import get_connection
+from django.core.management.base import NoArgsCommand
+
+from prometeo.core.notifications.models import OutgoingEmail
+
+class Command(NoArgsCommand):
+    help = "Sends the e-mails waiting in the outbox."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', action='store', type='int', dest='batch_size', default=None,
+            help='Max number of e-mails sent per batch (default: NOTIFICATION_EMAIL_BATCH_SIZE).'),
+        make_option('--force-digests', action='store_true', dest='force_digests', default=False,
+            help='Sends all the pending digests, even if not due yet.'),
+    )
+
+    def handle_noargs(self, **options):
+        worker = "%s:%d" % (socket.gethostname(), os.getpid())
+        verbosity = int(options.get('verbosity', 1))
+        connection = get_connection()
+        connection.open()
+        sent = 0
+        try:
+            while True:
+                count = OutgoingEmail.objects.flush(connection, options.get('batch_size'), options.get('force_digests'), worker)
+                if not count:
+                    break
+                sent += count
+        finally:
+            connection.close()
+        if verbosity > 0:
+            self.stdout.write("%d message(s) sent.\n" % sent)
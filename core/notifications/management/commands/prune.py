@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from django.conf import settings
+
+from prometeo.core.notifications.models import Activity, Notification
+
+class Command(NoArgsCommand):
+    help = "Deletes the expired notifications and activities, and the orphan activities."
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', action='store', type='int', dest='batch_size', default=None,
+            help='Max number of rows deleted per transaction (default: PRUNE_BATCH_SIZE).'),
+        make_option('--sleep', action='store', type='float', dest='sleep', default=0,
+            help='Seconds to wait between two batches.'),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        batch_size = options.get('batch_size') or getattr(settings, 'PRUNE_BATCH_SIZE', 5000)
+        sleep = options.get('sleep', 0)
+
+        for label, manager, queryset in (
+            ("expired notifications", Notification.objects, Notification.objects.expired),
+            ("expired activities", Activity.objects, Activity.objects.expired),
+            ("orphan activities", Activity.objects, Activity.objects.orphans),
+        ):
+            total = 0
+            while True:
+                start = time.time()
+                pks = list(queryset().values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                manager.delete_batch(pks)
+                total += len(pks)
+                if verbosity > 0:
+                    self.stdout.write("%s: %d row(s) deleted in %.2fs.\n" % (label, len(pks), time.time() - start))
+                if len(pks) < batch_size:
+                    break
+                if sleep:
+                    time.sleep(sleep)
+            if verbosity > 0:
+                self.stdout.write("%s: %d row(s) deleted.\n" % (label, total))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+
+from prometeo.core.notifications.models import NotificationCounter
+
+class Command(BaseCommand):
+    args = "[username ...]"
+    help = "Recomputes the unread notification counters (of the given users or all of them)."
+
+    def handle(self, *usernames, **options):
+        verbosity = int(options.get('verbosity', 1))
+        user_ids = None
+        if usernames:
+            user_ids = list(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
+        count = NotificationCounter.objects.rebuild(user_ids)
+        if verbosity > 0:
+            self.stdout.write("%d counter(s) rebuilt.\n" % count)
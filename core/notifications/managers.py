@@ -20,13 +20,335 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.db import models
+import uuid
+import operator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 
-class NotificationManager(models.Manager):
+from django.db import models, connections, transaction, IntegrityError
+from django.db.models.sql import DeleteQuery
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.template.loader import render_to_string
+from django.utils.translation import ugettext as _
+
+CURSOR_FORMAT = "%Y%m%d%H%M%S%f"
+
+@contextmanager
+def _joined_transaction():
+    yield
+
+def _commit_on_success_unless_managed(using):
+    """Returns a context manager running a block in its own transaction.
+
+    If the caller already manages a transaction, the block is part of it
+    instead, as a nested "commit_on_success" would commit it.
+    """
+    if transaction.is_managed(using=using):
+        return _joined_transaction()
+    return transaction.commit_on_success(using=using)
+
+def make_cursor(entry):
+    """Returns the pagination cursor pointing after the given timeline entry.
+    """
+    return "%s-%d" % (entry.created.strftime(CURSOR_FORMAT), entry.pk)
+
+def parse_cursor(cursor):
+    """Returns the (created, ID) pair encoded in the given cursor.
+    """
+    try:
+        created, id = cursor.split("-")
+        return datetime.strptime(created, CURSOR_FORMAT), int(id)
+    except ValueError:
+        raise ValueError("Invalid timeline cursor: %s" % cursor)
+
+class BulkInsertManager(models.Manager):
+    """Manager which can insert many objects with multi-row statements.
+    """
+    # Max number of parameters of a single statement (SQLite's limit is 999).
+    max_query_params = 999
+
+    def bulk_create(self, objs):
+        """Inserts the given objects with as few "INSERT ... VALUES (...), (...)" as possible.
+
+        Like any raw insert, it doesn't send "pre_save" or "post_save".
+        """
+        if not objs:
+            return
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        fields = [f for f in self.model._meta.local_fields if not isinstance(f, models.AutoField)]
+        rows = [[f.get_db_prep_save(f.pre_save(obj, True), connection=connection) for f in fields] for obj in objs]
+        placeholder = "(%s)" % ", ".join(["%s"] * len(fields))
+        batch_size = max(self.max_query_params // len(fields), 1)
+        cursor = connection.cursor()
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            cursor.execute("INSERT INTO %s (%s) VALUES %s" % (
+                qn(self.model._meta.db_table),
+                ", ".join([qn(f.column) for f in fields]),
+                ", ".join([placeholder] * len(batch)),
+            ), [param for row in batch for param in row])
+        transaction.commit_unless_managed(using=self.db)
+
+class RetentionManager(models.Manager):
+    """Manager for objects deleted after a retention period.
+
+    The period (in days) is read from the <RETENTION_SETTING>_RETENTION_DAYS
+    setting, and can be overridden per signature in the
+    <RETENTION_SETTING>_RETENTION_DAYS_BY_SIGNATURE dict. None means "forever".
+    """
+    retention_setting = None
+    signature_lookup = 'signature'
+
+    def expired(self, now=None):
+        """Returns the objects older than the retention period of their signature.
+        """
+        now = now or datetime.now()
+        days = getattr(settings, '%s_RETENTION_DAYS' % self.retention_setting, None)
+        days_by_signature = getattr(settings, '%s_RETENTION_DAYS_BY_SIGNATURE' % self.retention_setting, {})
+        conditions = []
+        for signature, signature_days in days_by_signature.items():
+            if signature_days is not None:
+                conditions.append(models.Q(created__lt=now - timedelta(days=signature_days), **{self.signature_lookup: signature}))
+        if days is not None:
+            q = models.Q(created__lt=now - timedelta(days=days))
+            if days_by_signature:
+                q &= ~models.Q(**{'%s__in' % self.signature_lookup: days_by_signature.keys()})
+            conditions.append(q)
+        if not conditions:
+            return self.none()
+        return self.filter(reduce(operator.or_, conditions)).order_by()
+
+    def delete_batch(self, pks):
+        """Deletes the given objects with set-based statements, in a single transaction.
+
+        Rows referencing them (foreign keys and many-to-many links) are deleted
+        too, but no signal is sent. If the caller manages a transaction, the
+        deletion is committed with it.
+        """
+        opts = self.model._meta
+        with _commit_on_success_unless_managed(self.db):
+            for related in opts.get_all_related_objects():
+                DeleteQuery(related.model).delete_batch(pks, self.db, related.field)
+            for field in opts.many_to_many:
+                through = field.rel.through
+                DeleteQuery(through).delete_batch(pks, self.db, through._meta.get_field(field.m2m_field_name()))
+            DeleteQuery(self.model).delete_batch(pks, self.db)
+
+class ActivityManager(RetentionManager):
+    """Manager for activities.
+    """
+    retention_setting = 'ACTIVITY'
+
+    def orphans(self):
+        """Returns the activities which don't belong to any stream.
+        """
+        return self.filter(streams__isnull=True).order_by()
+
+class NotificationManager(BulkInsertManager, RetentionManager):
     """Manager for notifications.
     """
+    retention_setting = 'NOTIFICATION'
+    signature_lookup = 'signature__slug'
+
+    def delete_batch(self, pks):
+        """Deletes the given notifications, rebuilding the counters of their users.
+        """
+        user_ids = list(self.filter(pk__in=pks, read__isnull=True).values_list('user', flat=True).distinct())
+        super(NotificationManager, self).delete_batch(pks)
+        if user_ids:
+            models.get_model('notifications', 'NotificationCounter').objects.rebuild(user_ids)
+
+    def insert_missing(self, objs):
+        """Inserts the given notifications, skipping the ones already delivered.
+
+        A notification is identified by its (dispatch UID, user) pair, so
+        delivering it again is a no-op. Returns the inserted notifications.
+        """
+        if not objs:
+            return []
+
+        existing = set(self.filter(
+            dispatch_uid__in=set([o.dispatch_uid for o in objs]),
+            user__in=set([o.user_id for o in objs])
+        ).values_list('dispatch_uid', 'user'))
+        missing = []
+        for o in objs:
+            key = (o.dispatch_uid, o.user_id)
+            if key not in existing:
+                existing.add(key)
+                missing.append(o)
+
+        try:
+            self.bulk_create(missing)
+        except IntegrityError:
+            # A concurrent delivery got there first: skips its rows too.
+            if transaction.is_managed(using=self.db):
+                raise
+            transaction.rollback_unless_managed(using=self.db)
+            return self.insert_missing(missing)
+
+        return missing
+
     def read(self):
         return self.filter(read__isnull=False)
 
     def unread(self):
         return self.filter(read__isnull=True)
+
+class NotificationCounterManager(BulkInsertManager):
+    """Manager for the unread notification counters.
+
+    A missing counter means "not computed yet": it's rebuilt the first time
+    it's read, while updates only touch the existing counters.
+    """
+    def unread(self, user):
+        """Returns the number of unread notifications of the given user.
+        """
+        user_id = getattr(user, 'pk', user)
+        try:
+            return self.filter(user=user_id).values_list('unread', flat=True)[0]
+        except IndexError:
+            # The counter is created before counting, so the notifications
+            # added in the meantime are not lost.
+            counter, is_new = self.get_or_create(user_id=user_id, defaults={'unread': 0})
+            if is_new:
+                unread = models.get_model('notifications', 'Notification').objects.filter(user=user_id, read__isnull=True).count()
+                self.filter(pk=counter.pk).update(unread=models.F('unread') + unread)
+                counter.unread += unread
+            return counter.unread
+
+    def add(self, user_ids, delta=1):
+        """Atomically adds delta to the counters of the given users.
+        """
+        if user_ids:
+            self.filter(user__in=user_ids).update(unread=models.F('unread') + delta)
+
+    def rebuild(self, user_ids=None):
+        """Recomputes the counters (of the given users or all of them) in bulk.
+
+        Returns the number of counters rebuilt.
+        """
+        notifications = models.get_model('notifications', 'Notification').objects.filter(read__isnull=True)
+        counters = self.all()
+        if user_ids is not None:
+            notifications = notifications.filter(user__in=user_ids)
+            counters = counters.filter(user__in=user_ids)
+        counts = dict(notifications.values_list('user').annotate(models.Count('id')).order_by())
+        if user_ids is None:
+            user_ids = list(counters.values_list('user', flat=True))
+        rows = [self.model(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in set(user_ids) | set(counts)]
+        with _commit_on_success_unless_managed(self.db):
+            counters.delete()
+            self.bulk_create(rows)
+        return len(rows)
+
+class TimelineEntryManager(BulkInsertManager):
+    """Manager for the timeline entries.
+    """
+    def page(self, user, cursor=None, limit=None):
+        """Returns a page of the given user's timeline and the cursor of the next one.
+
+        Entries are paginated on (created, id) instead of using OFFSET,
+        so each page is an index range scan whatever the history size. The
+        returned cursor is None on the last page.
+        """
+        limit = limit or getattr(settings, 'TIMELINE_PAGE_SIZE', 20)
+        entries = self.filter(user=user)
+        if cursor:
+            created, id = parse_cursor(cursor)
+            entries = entries.filter(models.Q(created__lt=created) | models.Q(created=created, id__lt=id))
+        entries = list(entries.select_related('activity').order_by('-created', '-id')[:limit + 1])
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = make_cursor(entries[-1])
+        return [e.activity for e in entries], next_cursor
+
+class OutgoingEmailManager(BulkInsertManager):
+    """Manager for the e-mails waiting in the outbox.
+    """
+    def claimable(self, now=None):
+        """Returns the e-mails which are not being sent by another flush.
+
+        Claims older than NOTIFICATION_EMAIL_CLAIM_TIMEOUT seconds are
+        considered abandoned.
+        """
+        now = now or datetime.now()
+        expired = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_EMAIL_CLAIM_TIMEOUT', 600))
+        return self.filter(models.Q(claimed_at__isnull=True) | models.Q(claimed_at__lt=expired))
+
+    def flush(self, connection=None, limit=None, force_digests=False, worker="inline"):
+        """Sends a batch of pending e-mails over a single connection.
+
+        The e-mails of users who chose the digest mode are collapsed in a
+        single message, sent once their oldest e-mail is older than
+        NOTIFICATION_DIGEST_INTERVAL seconds (or if "force_digests" is True).
+
+        The batch is claimed before sending, so concurrent flushes never send
+        the same e-mail twice, and each e-mail is deleted as soon as its
+        message is sent. Returns the number of sent messages.
+        """
+        limit = limit or getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 500)
+        email_from = getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@localhost.com')
+        now = datetime.now()
+        pending = self.claimable(now)
+
+        # Immediate e-mails.
+        ids = list(pending.exclude(user__emailpreference__digest=True).order_by('created', 'id').values_list('id', flat=True)[:limit])
+
+        # Digests.
+        digests = pending.filter(user__emailpreference__digest=True)
+        if not force_digests:
+            threshold = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_DIGEST_INTERVAL', 3600))
+            due_users = digests.values('user').annotate(oldest=models.Min('created')).filter(oldest__lte=threshold).values_list('user', flat=True)
+            digests = digests.filter(user__in=list(due_users[:limit]))
+        ids.extend(digests.values_list('id', flat=True))
+
+        if not ids:
+            return 0
+
+        # Each flush gets its own token, so e-mails claimed by another flush
+        # in the meantime are skipped.
+        token = "%s:%s" % (worker, uuid.uuid4().hex)
+        pending.filter(id__in=ids).update(worker=token, claimed_at=now)
+        claimed = self.filter(worker=token)
+
+        messages = []
+        emails_by_user = {}
+        digest_users = set(claimed.filter(user__emailpreference__digest=True).values_list('user', flat=True))
+        for email in claimed.order_by('created', 'id'):
+            if email.user_id in digest_users:
+                emails_by_user.setdefault(email.user_id, []).append(email)
+            else:
+                messages.append((EmailMessage(email.subject, email.body, email_from, [email.recipient,]), [email.pk]))
+        for emails in emails_by_user.values():
+            messages.append((EmailMessage(
+                _("%d new notifications") % len(emails),
+                render_to_string("notifications/email_digest.html", {'emails': emails}),
+                email_from,
+                [emails[-1].recipient,]
+            ), [e.pk for e in emails]))
+
+        # A connection opened here is closed here, while a given one is left
+        # to the caller.
+        own_connection = connection is None
+        if own_connection:
+            connection = get_connection()
+            connection.open()
+        sent = 0
+        try:
+            for message, email_ids in messages:
+                message.content_subtype = "html"
+                connection.send_messages([message])
+                self.filter(pk__in=email_ids).delete()
+                sent += 1
+        finally:
+            # What was not sent can be picked up by the next flush.
+            claimed.update(worker=None, claimed_at=None)
+            if own_connection:
+                connection.close()
+
+        return sent
@@ -20,12 +20,14 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-import hashlib
+import uuid
 from datetime import datetime
 
 from django.db import models
 import django.utils.simplejson as json
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ugettext_lazy as _, get_language
+from django.core.cache import cache
+from django.conf import settings
 from django.template.loader import render_to_string
 from django.core.exceptions import ValidationError
 
@@ -35,31 +37,52 @@ from prometeo.core.utils import field_to_string
 from managers import *
 
 class Observable(object):
-    """Mix-in that sends a special signal when a field is changed.
+    """Mix-in that tracks the changes of the fields since the last load or save.
+
+    Raw field values are stored when the object is loaded: the diff (and the
+    string representation of the changed values only) is computed on demand.
     """
     def __init__(self, *args, **kwargs):
         super(Observable, self).__init__(*args, **kwargs)
-        self.__changes = {}
-        self.__field_cache = dict([(f.attname, f) for f in (self._meta.fields)])
+        self.reset_changes()
 
-    def __setattr__(self, name, value):
-        try:
-            if self.pk and name in self.__field_cache:
-                field = self.__field_cache[name]
-                label = u"%s" % field.verbose_name
-                if name not in self.__change_exclude:
-                    old_value = field_to_string(field, self)
-                    if label in self.__changes:
-                        old_value = self.__changes[label][0]
-                    super(Observable, self).__setattr__(name, value)
-                    value = field_to_string(field, self)
-                    if value != old_value:
-                        self.__changes[label] = (u"%s" % old_value, u"%s" % value)
-                    return
-        except AttributeError:
-            pass
-
-        super(Observable, self).__setattr__(name, value)
+    def _observed_fields(self):
+        return [f for f in self._meta.fields if f.attname not in self.__change_exclude]
+
+    def reset_changes(self):
+        """Takes a new snapshot of the current field values.
+        """
+        values = self.__dict__
+        self.__snapshot = dict([(f.attname, values[f.attname]) for f in self._observed_fields() if f.attname in values])
+
+    def get_changes(self):
+        """Returns the changed fields as a dict of (old value, new value) strings.
+
+        Keys are the verbose names of the changed fields.
+        """
+        changes = {}
+        snapshot = getattr(self, '_Observable__snapshot', {})
+        if not self.pk or not snapshot:
+            return changes
+
+        changed_fields = [f for f in self._observed_fields() if f.attname in snapshot and snapshot[f.attname] != self.__dict__.get(f.attname)]
+        if not changed_fields:
+            return changes
+
+        # A detached copy holding the old values, used to render them.
+        old = self.__class__.__new__(self.__class__)
+        old.__dict__.update(self.__dict__)
+        for f in changed_fields:
+            old.__dict__[f.attname] = snapshot[f.attname]
+            old.__dict__.pop(f.get_cache_name(), None)
+
+        for f in changed_fields:
+            old_value = u"%s" % field_to_string(f, old)
+            value = u"%s" % field_to_string(f, self)
+            if value != old_value:
+                changes[u"%s" % f.verbose_name] = (old_value, value)
+
+        return changes
 
 class Signature(models.Model):
     """Signature model.
@@ -107,9 +130,11 @@ class Activity(models.Model):
     signature = models.CharField(_('signature'), max_length=50)
     template = models.CharField(_('template'), blank=True, null=True, max_length=200, default=None)
     context = models.TextField(_('context'), blank=True, null=True, validators=[validate_json], help_text=_('Use the JSON syntax.'))
-    created = models.DateTimeField(auto_now_add=True, verbose_name=_('created'))
+    created = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_('created'))
     streams = models.ManyToManyField(Stream, null=True, verbose_name=_('streams'))
     backlink = models.CharField(_('backlink'), blank=True, null=True, max_length=200)
+
+    objects = ActivityManager()
     
     class Meta:
         verbose_name = _('activity')
@@ -117,10 +142,7 @@ class Activity(models.Model):
         ordering = ('-created',)
 
     def __unicode__(self):
-        try:
-            return self.title % self.get_context()
-        except:
-            return self.title
+        return self._get_rendered()[0]
 
     def get_context(self):
         try:
@@ -129,16 +151,70 @@ class Activity(models.Model):
             return {}
 
     def get_content(self):
+        return self._get_rendered()[1]
+
+    def _render(self):
+        context = self.get_context()
+        try:
+            title = self.title % context
+        except:
+            title = self.title
         template_name = "notifications/activities/%s.html" % self.signature
         if self.template:
             template_name = self.template
-        return render_to_string(template_name, self.get_context())
+        return (u"%s" % title, render_to_string(template_name, context))
+
+    def _get_rendered(self):
+        """Returns the rendered title and content, cached per language.
+
+        Activities never change once created, so the cache entries are
+        replaced only when ACTIVITY_TEMPLATES_VERSION is bumped. The creation
+        time is part of the key, so an activity reusing the ID of a deleted
+        one doesn't get its content.
+        """
+        rendered = self.__dict__.setdefault('_rendered', {})
+        language = get_language()
+        if language not in rendered:
+            key = None
+            value = None
+            if self.pk:
+                # Microseconds are left out, as not every database stores them.
+                created = self.created and self.created.strftime("%Y%m%d%H%M%S")
+                key = "activity:%d:%s:%s:%s" % (self.pk, created, language, getattr(settings, 'ACTIVITY_TEMPLATES_VERSION', 1))
+                value = cache.get(key)
+            if value is None:
+                value = self._render()
+                if key:
+                    cache.set(key, value, getattr(settings, 'ACTIVITY_CACHE_TIMEOUT', 604800))
+            rendered[language] = value
+        return rendered[language]
         
     def get_absolute_url(self):
         if self.backlink:
             return self.backlink
         return ""
 
+class TimelineEntry(models.Model):
+    """An activity delivered to the timeline of a follower.
+
+    Entries are written when an activity is forwarded to its streams, so a
+    timeline is read without joining activities, streams and followers.
+    """
+    user = models.ForeignKey('auth.User', verbose_name=_('user'))
+    activity = models.ForeignKey(Activity, verbose_name=_('activity'))
+    created = models.DateTimeField(verbose_name=_('created'))
+
+    objects = TimelineEntryManager()
+
+    class Meta:
+        verbose_name = _('timeline entry')
+        verbose_name_plural = _('timeline entries')
+        ordering = ('-created', '-id')
+        unique_together = (('user', 'activity'),)
+
+    def __unicode__(self):
+        return u"%s" % self.activity
+
 class Notification(models.Model):
     """Notification model.
     """
@@ -146,7 +222,7 @@ class Notification(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name=_('description'))
     user = models.ForeignKey('auth.User', verbose_name=_('user'))
     signature = models.ForeignKey(Signature, verbose_name=_('signature'))
-    created = models.DateTimeField(auto_now_add=True, verbose_name=_('created on'))
+    created = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_('created on'))
     read = models.DateTimeField(blank=True, null=True, verbose_name=_('read on'))
     dispatch_uid = models.CharField(max_length=32, verbose_name=_('dispatch UID'))
 
@@ -157,6 +233,7 @@ class Notification(models.Model):
         verbose_name_plural = _('notifications')
         ordering = ('-created', 'id')
         get_latest_by = '-created'
+        unique_together = (('dispatch_uid', 'user'),)
 
     def __unicode__(self):
         return self.title
@@ -174,7 +251,65 @@ class Notification(models.Model):
             raise ValidationError('The user is not subscribed for this kind of notification.')
         super(Notification, self).clean()
 
+    def mark_read(self):
+        """Marks the notification as read, updating the counter of its user once.
+        """
+        if self.read:
+            return
+        self.read = datetime.now()
+        if Notification.objects.filter(pk=self.pk, read__isnull=True).update(read=self.read):
+            NotificationCounter.objects.add([self.user_id], -1)
+
     def save(self, *args, **kwargs):
-        if self.dispatch_uid is None:
-            self.dispatch_uid = hashlib.md5(self.title + self.description + datetime.now()).hexdigest()
+        if not self.dispatch_uid:
+            self.dispatch_uid = uuid.uuid4().hex
         super(Notification, self).save(*args, **kwargs)
+
+class NotificationCounter(models.Model):
+    """Number of unread notifications of a user.
+    """
+    user = models.OneToOneField('auth.User', verbose_name=_('user'))
+    unread = models.IntegerField(default=0, verbose_name=_('unread'))
+
+    objects = NotificationCounterManager()
+
+    class Meta:
+        verbose_name = _('notification counter')
+        verbose_name_plural = _('notification counters')
+
+    def __unicode__(self):
+        return u"%s" % self.unread
+
+class EmailPreference(models.Model):
+    """E-mail delivery preferences of a user.
+    """
+    user = models.OneToOneField('auth.User', verbose_name=_('user'))
+    digest = models.BooleanField(default=False, verbose_name=_('digest'), help_text=_('Collapse notification e-mails in a single periodic message.'))
+
+    class Meta:
+        verbose_name = _('e-mail preference')
+        verbose_name_plural = _('e-mail preferences')
+
+    def __unicode__(self):
+        return u"%s" % self.user
+
+class OutgoingEmail(models.Model):
+    """An e-mail waiting in the outbox.
+    """
+    user = models.ForeignKey('auth.User', verbose_name=_('user'))
+    recipient = models.EmailField(verbose_name=_('recipient'))
+    subject = models.CharField(max_length=200, verbose_name=_('subject'))
+    body = models.TextField(blank=True, verbose_name=_('body'))
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('created on'))
+    worker = models.CharField(max_length=150, blank=True, null=True, verbose_name=_('worker'))
+    claimed_at = models.DateTimeField(blank=True, null=True, db_index=True, verbose_name=_('claimed at'))
+
+    objects = OutgoingEmailManager()
+
+    class Meta:
+        verbose_name = _('outgoing e-mail')
+        verbose_name_plural = _('outgoing e-mails')
+        ordering = ('created', 'id')
+
+    def __unicode__(self):
+        return self.subject
@@ -21,13 +21,14 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 import django.dispatch
-from django.db import models
+from django.db import models, connections, transaction
 from django.utils.translation import ugettext_noop as _
-from django.core.mail import EmailMessage
 from django.contrib.auth.models import User
 from django.contrib.comments.models import Comment
 from django.conf import settings
 
+from prometeo.core.models import Job
+from prometeo.core.utils import update_fields, register_provisioner
 from prometeo.core.auth.models import MyPermission, ObjectPermission
 from prometeo.core.auth.cache import LoggedInUserCache
 
@@ -44,24 +45,52 @@ def register_follower_to_stream(follower, stream):
         except:
             stream.followers.add(follower)
 
-def register_activity_to_stream(activity, stream):
-    """Registers the given activity to the given stream(s).
+def record_activity(stream, author, title, signature, context, template=None, backlink=None):
+    """Queues the creation of an activity on the given stream(s).
     """
     try:
-        [activity.streams.add(s) for s in stream]
-    except:
-        activity.streams.add(stream)
+        stream_ids = [s.pk for s in stream]
+    except TypeError:
+        stream_ids = [stream.pk]
+
+    Job.objects.enqueue(
+        create_activity,
+        stream_ids,
+        getattr(author, 'pk', None),
+        title,
+        signature,
+        json.dumps(context),
+        template,
+        backlink
+    )
+
+def deliver_to_timelines(activity, stream_ids):
+    """Adds the given activity to the timelines of the followers of the given streams.
+    """
+    followers = set(Stream.followers.through.objects.filter(stream__in=stream_ids).values_list('user', flat=True))
+    followers -= set(TimelineEntry.objects.filter(activity=activity).values_list('user', flat=True))
+    TimelineEntry.objects.bulk_create([TimelineEntry(user_id=user_id, activity=activity, created=activity.created) for user_id in followers])
 
 def manage_stream(cls):
     """Connects handlers for stream management.
     """
-    models.signals.post_save.connect(create_stream, cls, dispatch_uid="%s_stream_creation" % cls.__name__)
+    register_provisioner(cls, "stream", allocate_stream)
     models.signals.post_delete.connect(delete_stream, cls, dispatch_uid="%s_stream_deletion" % cls.__name__)
 
+def allocate_stream(sender, instance):
+    """Returns a new (empty) stream for the given object.
+    """
+    stream, is_new = Stream.objects.get_or_create(slug="%s_%d_stream" % (sender.__name__.lower(), instance.pk))
+    if not is_new:
+        for a in stream.activity_set.all():
+            a.delete()
+    stream_attach.send(sender=sender, instance=instance, stream=stream)
+    return stream
+
 def make_observable(cls, exclude=['stream_id', 'dashboard_id', 'modified']):
     """Adds Observable mix-in to the given class.
     """
-    if Observable not in cls.__bases__:
+    if not issubclass(cls, Observable):
         class _Observable(Observable):
             __change_exclude = exclude
         cls.__bases__ += (_Observable,)
@@ -93,8 +122,6 @@ def notify_object_created(sender, instance, *args, **kwargs):
                 "link": instance.get_absolute_url(),
             }
 
-            register_follower_to_stream(author, stream)
-
             if author:
                 title = _("%(class)s %(name)s created by %(author)s")
                 context.update({
@@ -102,16 +129,16 @@ def notify_object_created(sender, instance, *args, **kwargs):
                     "author_link": author.get_absolute_url()
                 })
 
-            activity = Activity.objects.create(
+            record_activity(
+                stream,
+                author,
                 title=title,
                 signature="%s-created" % sender.__name__.lower(),
                 template="notifications/activities/object-created.html",
-                context=json.dumps(context),
+                context=context,
                 backlink=instance.get_absolute_url()
             )
 
-            register_activity_to_stream(activity, stream)
-
         except:
             pass
 
@@ -132,8 +159,6 @@ def notify_object_changed(sender, instance, changes, *args, **kwargs):
             "changes": changes
         }
 
-        register_follower_to_stream(author, stream)
-
         if author:
             title = _("%(class)s %(name)s changed by %(author)s")
             context.update({
@@ -141,16 +166,16 @@ def notify_object_changed(sender, instance, changes, *args, **kwargs):
                 "author_link": author.get_absolute_url()
             })
 
-        activity = Activity.objects.create(
+        record_activity(
+            stream,
+            author,
             title=title,
             signature="%s-changed" % sender.__name__.lower(),
             template="notifications/activities/object-changed.html",
-            context=json.dumps(context),
+            context=context,
             backlink=instance.get_absolute_url()
         )
 
-        register_activity_to_stream(activity, stream)
-
     except:
         pass
 
@@ -169,8 +194,6 @@ def notify_object_deleted(sender, instance, *args, **kwargs):
             "name": "%s" % instance
         }
 
-        register_follower_to_stream(author, stream)
-
         if author:
             title = _("%(class)s %(name)s deleted by %(author)s")
             context.update({
@@ -178,33 +201,71 @@ def notify_object_deleted(sender, instance, *args, **kwargs):
                 "author_link": author.get_absolute_url()
             })
 
-        activity = Activity.objects.create(
+        record_activity(
+            stream,
+            author,
             title=title,
             signature="%s-deleted" % sender.__name__.lower(),
             template="notifications/activities/object-deleted.html",
-            context=json.dumps(context)
+            context=context
         )
 
-        register_activity_to_stream(activity, stream)
-
     except:
         pass
 
 def notify_m2m_changed(sender, instance, action, reverse, model, pk_set, *args, **kwargs):
-    """Generates one or more activities related to the change of an existing many-to-many relationship.
+    """Generates an activity listing the objects added to (or removed from) a many-to-many relationship.
     """
-    create_stream(sender, instance)
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
 
-    try:            
+    cls = instance.__class__
+    create_stream(cls, instance)
+
+    try:
         stream = kwargs.get('stream', instance.stream)
 
-        if action == "post_add":
-            for pk in pk_set:
-                notify_object_created(sender=model, instance=model.objects.get(pk=pk), stream=stream)
+        field = model._meta.verbose_name_plural
+        for f in cls._meta.many_to_many:
+            if f.rel.through == sender:
+                field = f.verbose_name
 
-        elif action == "post_remove":
-            for pk in pk_set:
-                notify_object_deleted(sender=model, instance=model.objects.get(pk=pk), stream=stream)
+        objects = [{"name": "%s" % o, "link": getattr(o, "get_absolute_url", lambda: "")()} for o in model.objects.in_bulk(list(pk_set)).values()]
+
+        author = LoggedInUserCache().current_user
+        verb = (action == "post_add") and "added" or "removed"
+        if verb == "added":
+            title = _("%(count)s %(field)s added to %(class)s %(name)s")
+        else:
+            title = _("%(count)s %(field)s removed from %(class)s %(name)s")
+        context = {
+            "class": cls.__name__.lower(),
+            "name": "%s" % instance,
+            "link": instance.get_absolute_url(),
+            "field": unicode(field),
+            "count": len(objects),
+            "objects": objects
+        }
+
+        if author:
+            if verb == "added":
+                title = _("%(count)s %(field)s added to %(class)s %(name)s by %(author)s")
+            else:
+                title = _("%(count)s %(field)s removed from %(class)s %(name)s by %(author)s")
+            context.update({
+                "author": "%s" % author,
+                "author_link": author.get_absolute_url()
+            })
+
+        record_activity(
+            stream,
+            author,
+            title=title,
+            signature="%s-changed" % cls.__name__.lower(),
+            template="notifications/activities/objects-%s.html" % verb,
+            context=context,
+            backlink=instance.get_absolute_url()
+        )
 
     except:
         pass
@@ -222,24 +283,22 @@ def notify_comment_created(sender, instance, *args, **kwargs):
 
             author = instance.user or LoggedInUserCache().current_user
 
-            register_follower_to_stream(author, stream)
-
-            activity = Activity.objects.create(
+            record_activity(
+                stream,
+                author,
                 title=_("%(author)s commented %(class)s %(name)s"),
                 signature="comment-created",
-                context=json.dumps({
+                context={
                     "class": obj.__class__.__name__.lower(),
                     "name": "%s" % obj,
                     "link": instance.get_absolute_url(),
                     "author": "%s" % author,
                     "author_link": author.get_absolute_url(),
                     "comment": instance.comment
-                }),
+                },
                 backlink=obj.get_absolute_url()
             )
 
-            register_activity_to_stream(activity, stream)
-
         except:
             pass
 
@@ -255,22 +314,20 @@ def notify_comment_deleted(sender, instance, *args, **kwargs):
 
         author = LoggedInUserCache().current_user or instance.user
 
-        register_follower_to_stream(author, stream)
-
-        activity = Activity.objects.create(
+        record_activity(
+            stream,
+            author,
             title=_("comment deleted by %(author)s"),
             signature="comment-deleted",
-            context=json.dumps({
+            context={
                 "class": obj.__class__.__name__.lower(),
                 "name": "%s" % obj,
                 "link": instance.get_absolute_url(),
                 "author": "%s" % author,
                 "author_link": author.get_absolute_url()
-            })
+            }
         )
 
-        register_activity_to_stream(activity, stream)
-
     except:
         pass
 
@@ -279,57 +336,39 @@ def notify_changes(sender, instance, **kwargs):
     
     Changes are notified sending a "post_change" signal.
     """
+    if not isinstance(instance, Observable):
+        return
+
+    changes = {}
     if not kwargs['created']:
-        try:
-            changes = {}
-            for name, (old_value, value) in instance._Observable__changes.items():
-                if value != old_value:
-                    changes[name] = (old_value, value)  
-            instance._Observable__changes = {}
-            if changes:
-                post_change.send(sender=sender, instance=instance, changes=changes)
-        except AttributeError:
-            pass
+        changes = instance.get_changes()
+    instance.reset_changes()
+    if changes:
+        post_change.send(sender=sender, instance=instance, changes=changes)
 
 def forward_activity(sender, instance, action, reverse, model, pk_set, **kwargs):
-    """Forwards a new activity to all the linked streams.
+    """Queues the forwarding of a new activity to all the linked streams.
+
+    The activity is notified to the followers once it's been forwarded.
     """
     if not isinstance(instance, Activity):
         return
 
     if action == "post_add":
-        for stream_id in pk_set:
-            stream = Stream.objects.get(id=stream_id)
-            for s in stream.linked_streams.all():
-                s.activity_set.add(instance)       
+        Job.objects.enqueue(forward_to_linked_streams, instance.pk, list(pk_set))
 
 def notify_activity(sender, instance, action, *args, **kwargs):
-    """Notifies a new activity to all the followers of the related streams.
+    """Deletes an activity when it's removed from all its streams.
+
+    New activities are notified by "forward_to_linked_streams".
     """
     if not isinstance(instance, Activity):
         return
 
     activity = instance
-    content = activity.get_content()
-
-    # Notifies an activity to all the followers.
-    if action == "post_add":
-        subscriptions = Subscription.objects.filter(signature__slug=activity.signature).distinct()
-        streams = activity.streams.all()
-        for subscription in subscriptions:
-            for stream in streams:
-                if subscription.user in stream.followers.all():
-                    notification, is_new = Notification.objects.get_or_create(
-                        signature=subscription.signature,
-                        user=subscription.user,
-                        description=content,
-                        title=u"%s" % activity,
-                        dispatch_uid="%d" % activity.id,
-                    )
-                    break
 
     # Deletes orphans.
-    elif action in ["post_remove", "post_clear"]:
+    if action in ["post_remove", "post_clear"]:
         streams = activity.streams.all()
         if len(streams) == 0:
             activity.delete()
@@ -340,23 +379,17 @@ def clear_orphans(sender, instance, *args, **kwargs):
     if not isinstance(instance, Stream):
         return
 
-    # Deletes orphans.
-    for activity in instance.activity_set.all():
-        streams = activity.streams.all()
-        if len(streams) == 1 and streams[0] == instance:
-            activity.delete()
+    # Deletes the activities which don't belong to any other stream.
+    links = Activity.streams.through.objects
+    activity_ids = set(links.filter(stream=instance).values_list('activity', flat=True))
+    shared_ids = set(links.filter(activity__in=activity_ids).exclude(stream=instance).values_list('activity', flat=True))
+    Activity.objects.delete_batch(list(activity_ids - shared_ids))
 
 def create_stream(sender, instance, *args, **kwargs):
     """Creates a new stream for the given object.
     """
     if hasattr(instance, "stream") and not instance.stream:
-        stream, is_new = Stream.objects.get_or_create(slug="%s_%d_stream" % (sender.__name__.lower(), instance.pk))
-        if not is_new:
-            for a in stream.activities.all():
-                a.delete()
-        stream_attach.send(sender=sender, instance=instance, stream=stream)
-        instance.stream = stream
-        instance.save()
+        update_fields(instance, stream=allocate_stream(sender, instance))
 
 def delete_stream(sender, instance, *args, **kwargs):
     """Deletes the stream of the given object.
@@ -367,13 +400,118 @@ def delete_stream(sender, instance, *args, **kwargs):
         instance.stream = None
 
 def send_notification_email(sender, instance, signal, *args, **kwargs):
-    if Subscription.objects.filter(signature=instance.signature, user=instance.user, send_email=True).count() > 0:
-        email_subject = instance.title
-        email_body = instance.description
-        email_from = getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@localhost.com')
-        email = EmailMessage(email_subject, email_body, email_from, [instance.user.email,])
-        email.content_subtype = "html"
-        email.send()
+    """Puts a new notification in the outbox, if the user subscribed for e-mails.
+    """
+    if kwargs.get('created', False):
+        if Subscription.objects.filter(signature=instance.signature_id, user=instance.user_id, send_email=True).count() > 0:
+            OutgoingEmail.objects.create(
+                user_id=instance.user_id,
+                recipient=instance.user.email,
+                subject=instance.title,
+                body=instance.description or ""
+            )
+
+def count_notification(sender, instance, signal, *args, **kwargs):
+    """Updates the unread counter of the user when a notification is added or removed.
+    """
+    if instance.read:
+        return
+    if signal == models.signals.post_delete:
+        NotificationCounter.objects.add([instance.user_id], -1)
+    elif kwargs.get('created', False):
+        NotificationCounter.objects.add([instance.user_id], 1)
+
+## JOBS ##
+
+def create_activity(stream_ids, author_id, title, signature, context, template=None, backlink=None):
+    """Creates an activity and registers it (and its author) to the given streams.
+    """
+    streams = Stream.objects.filter(pk__in=stream_ids)
+
+    if author_id:
+        register_follower_to_stream(User.objects.get(pk=author_id), streams)
+
+    activity = Activity.objects.create(
+        title=title,
+        signature=signature,
+        template=template,
+        context=context,
+        backlink=backlink
+    )
+
+    activity.streams.add(*streams)
+
+def forward_to_linked_streams(activity_id, stream_ids):
+    """Forwards an activity to all the streams (transitively) linked to the given ones.
+
+    The missing links are inserted in bulk, without sending "m2m_changed", and
+    then the activity is delivered to the timelines and notified once for the
+    whole set of streams.
+    """
+    try:
+        activity = Activity.objects.get(pk=activity_id)
+    except Activity.DoesNotExist:
+        return
+
+    # Transitive closure of the links, computed level by level.
+    links = Stream.linked_streams.through.objects
+    reached = set(stream_ids)
+    frontier = set(stream_ids)
+    while frontier:
+        frontier = set(links.filter(from_stream__in=frontier).values_list('to_stream', flat=True)) - reached
+        reached |= frontier
+
+    through = Activity.streams.through
+    missing = reached - set(through.objects.filter(activity=activity).values_list('stream', flat=True))
+    if missing:
+        connection = connections[through.objects.db]
+        qn = connection.ops.quote_name
+        cursor = connection.cursor()
+        cursor.executemany("INSERT INTO %s (%s, %s) VALUES (%%s, %%s)" % (
+            qn(through._meta.db_table),
+            qn(through._meta.get_field('activity').column),
+            qn(through._meta.get_field('stream').column),
+        ), [(activity.pk, stream_id) for stream_id in missing])
+        transaction.commit_unless_managed(using=through.objects.db)
+
+    deliver_to_timelines(activity, reached)
+    notify_followers(activity.pk)
+
+def notify_followers(activity_id):
+    """Notifies an activity to all the subscribed followers of its streams.
+    """
+    try:
+        activity = Activity.objects.get(pk=activity_id)
+    except Activity.DoesNotExist:
+        return
+
+    content = activity.get_content()
+
+    # Subscribers following at least one stream of the activity.
+    dispatch_uid = "%d" % activity.id
+    recipients = Subscription.objects.filter(signature__slug=activity.signature, user__stream__activity=activity) \
+                                     .values_list('user', 'signature', 'send_email', 'user__email') \
+                                     .order_by()
+    title = u"%s" % activity
+    notifications, emails = {}, {}
+    for user_id, signature_id, by_email, email in recipients:
+        if user_id not in notifications:
+            notifications[user_id] = Notification(
+                signature_id=signature_id,
+                user_id=user_id,
+                description=content,
+                title=title,
+                dispatch_uid=dispatch_uid,
+            )
+        if by_email and email:
+            emails[user_id] = email
+
+    # Users who have already been notified (e.g. when the job is retried) are skipped.
+    user_ids = [n.user_id for n in Notification.objects.insert_missing(notifications.values())]
+
+    # Bulk inserts don't send "post_save", so counters and e-mails are updated here.
+    NotificationCounter.objects.add(user_ids, 1)
+    OutgoingEmail.objects.bulk_create([OutgoingEmail(user_id=user_id, recipient=emails[user_id], subject=title[:200], body=content) for user_id in user_ids if user_id in emails])
 
 ## SIGNALS ##
 
@@ -391,3 +529,5 @@ models.signals.post_save.connect(notify_comment_created, Comment, dispatch_uid="
 models.signals.post_delete.connect(notify_comment_deleted, Comment, dispatch_uid="comment_deleted")
 
 models.signals.post_save.connect(send_notification_email, Notification)
+models.signals.post_save.connect(count_notification, Notification, dispatch_uid="count_notification_saved")
+models.signals.post_delete.connect(count_notification, Notification, dispatch_uid="count_notification_deleted")
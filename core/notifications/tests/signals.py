@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import unittest
+from django.db import transaction
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.models import User
+from django.conf import settings
+
+from prometeo.core.models import Job
+from prometeo.core.calendar.models import Event
+
+from ..models import *
+from ..signals import *
+
+class RecordingBackend(EmailBackend):
+    calls = []
+
+    def open(self):
+        self.calls.append("open")
+
+    def close(self):
+        self.calls.append("close")
+
+    def send_messages(self, messages):
+        self.calls.append("send")
+        return super(RecordingBackend, self).send_messages(messages)
+
+class NotifyActivityTestCase(TestCase):
+    def test_fan_out(self):
+        signature, is_new = Signature.objects.get_or_create(slug="fan-out", title="Fan-out")
+        u1 = User.objects.create(username="nu1", password="test", email="nu1@test.it")
+        u2 = User.objects.create(username="nu2", password="test", email="nu2@test.it")
+        u3 = User.objects.create(username="nu3", password="test", email="nu3@test.it")
+        Subscription.objects.create(user=u1, signature=signature, send_email=True)
+        Subscription.objects.create(user=u2, signature=signature, send_email=False)
+        Subscription.objects.create(user=u3, signature=signature, send_email=True)
+        s1 = Stream.objects.create(slug="fan_out_stream_1")
+        s2 = Stream.objects.create(slug="fan_out_stream_2")
+        s1.followers.add(u1, u2)
+        s2.followers.add(u1)
+        s1.linked_streams.add(s2)
+        a = Activity.objects.create(title="fan-out", signature="fan-out", template="notifications/activities/object-deleted.html", context="{}")
+        outbox = len(mail.outbox)
+        a.streams.add(s1)
+        self.assertEqual(Notification.objects.filter(dispatch_uid="%d" % a.pk).count(), 0)
+        Job.objects.run_pending()
+        notifications = Notification.objects.filter(dispatch_uid="%d" % a.pk)
+        self.assertEqual(sorted(notifications.values_list('user', flat=True)), [u1.pk, u2.pk])
+        self.assertEqual(list(OutgoingEmail.objects.filter(user__in=[u1, u2, u3]).values_list('recipient', flat=True)), [u1.email])
+        OutgoingEmail.objects.flush()
+        self.assertEqual(len(mail.outbox), outbox + 1)
+        self.assertEqual(mail.outbox[-1].to, [u1.email])
+        a.streams.add(s2)
+        Job.objects.run_pending()
+        self.assertEqual(notifications.count(), 2)
+        notify_followers(a.pk)
+        self.assertEqual(notifications.count(), 2)
+
+    def test_transitive_forwarding(self):
+        signature, is_new = Signature.objects.get_or_create(slug="chain", title="Chain")
+        u = User.objects.create(username="chain", password="test", email="chain@test.it")
+        Subscription.objects.create(user=u, signature=signature, send_email=False)
+        ticket = Stream.objects.create(slug="chain_ticket_stream")
+        milestone = Stream.objects.create(slug="chain_milestone_stream")
+        project = Stream.objects.create(slug="chain_project_stream")
+        ticket.linked_streams.add(milestone)
+        milestone.linked_streams.add(project)
+        project.linked_streams.add(ticket)
+        project.followers.add(u)
+        a = Activity.objects.create(title="chain", signature="chain", template="notifications/activities/object-deleted.html", context="{}")
+        a.streams.add(ticket)
+        self.assertEqual(Job.objects.run_pending(), 1)
+        self.assertEqual(set(a.streams.all()), set([ticket, milestone, project]))
+        self.assertEqual(Notification.objects.filter(dispatch_uid="%d" % a.pk, user=u).count(), 1)
+
+    def test_m2m_changed(self):
+        author = User.objects.create(username="m2m", password="test", email="m2m@test.it")
+        attendees = [User.objects.create(username="m2m%d" % i, password="test", email="m2m%d@test.it" % i) for i in range(3)]
+        e = Event(title="Party", start=datetime.now(), author=author)
+        e.save()
+        Job.objects.run_pending()
+        e = Event.objects.get(pk=e.pk)
+        e.attendees.add(*attendees)
+        e.attendees.remove(attendees[0])
+        Job.objects.run_pending()
+        added, removed = [e.stream.activity_set.get(template="notifications/activities/objects-%s.html" % verb) for verb in ("added", "removed")]
+        self.assertEqual(added.signature, "event-changed")
+        self.assertEqual(u"%s" % added, u"3 attendees added to event Party")
+        self.assertTrue(all([u.username in added.get_content() for u in attendees]))
+        self.assertEqual(added.get_context()["count"], 3)
+        self.assertEqual(removed.get_context()["objects"][0]["name"], "m2m0")
+
+    def test_record_activity(self):
+        s = Stream.objects.create(slug="record_activity_stream")
+        u = User.objects.create(username="ra", password="test", email="ra@test.it")
+        record_activity(s, u, title="recorded", signature="recorded", context={"name": "test"})
+        self.assertEqual(s.activity_set.count(), 0)
+        Job.objects.run_pending()
+        self.assertEqual(s.activity_set.get().get_context(), {"name": "test"})
+        self.assertTrue(u in s.followers.all())
+
+class ActivityTestCase(TestCase):
+    def test_rendering_cache(self):
+        a = Activity.objects.create(title="%(name)s renamed", signature="renamed", template="notifications/activities/object-deleted.html", context='{"name": "foo", "class": "bar"}')
+        self.assertEqual(u"%s" % a, u"foo renamed")
+        content = a.get_content()
+        self.assertTrue("foo" in content)
+        Activity.objects.filter(pk=a.pk).update(title="changed", context="{}")
+        a = Activity.objects.get(pk=a.pk)
+        self.assertEqual(u"%s" % a, u"foo renamed")
+        self.assertEqual(a.get_content(), content)
+
+        # An activity reusing the ID gets its own cache entry.
+        pk = a.pk
+        a.delete()
+        Activity.objects.create(pk=pk, title="%(name)s reused", signature="reused", template="notifications/activities/object-deleted.html", context='{"name": "baz", "class": "bar"}')
+        Activity.objects.filter(pk=pk).update(created=datetime.now() - timedelta(days=1))
+        self.assertEqual(u"%s" % Activity.objects.get(pk=pk), u"baz reused")
+
+class OutgoingEmailTestCase(TestCase):
+    def test_digest(self):
+        u1 = User.objects.create(username="ou1", password="test", email="ou1@test.it")
+        u2 = User.objects.create(username="ou2", password="test", email="ou2@test.it")
+        EmailPreference.objects.create(user=u2, digest=True)
+        for i in range(3):
+            OutgoingEmail.objects.create(user=u1, recipient=u1.email, subject="immediate %d" % i, body="<p>%d</p>" % i)
+            OutgoingEmail.objects.create(user=u2, recipient=u2.email, subject="digest %d" % i, body="<p>%d</p>" % i)
+        outbox = len(mail.outbox)
+        self.assertEqual(OutgoingEmail.objects.flush(), 3)
+        self.assertEqual([m.to for m in mail.outbox[outbox:]], [[u1.email]] * 3)
+        self.assertEqual(OutgoingEmail.objects.filter(user=u2).count(), 3)
+        self.assertEqual(OutgoingEmail.objects.flush(force_digests=True), 1)
+        self.assertEqual(mail.outbox[-1].to, [u2.email])
+        self.assertTrue("<p>2</p>" in mail.outbox[-1].body)
+        self.assertEqual(OutgoingEmail.objects.filter(user__in=[u1, u2]).count(), 0)
+
+    def test_claims(self):
+        class FailingConnection(object):
+            def __init__(self):
+                self.sent = []
+            def send_messages(self, messages):
+                if self.sent:
+                    raise IOError("connection lost")
+                self.sent.extend(messages)
+        u = User.objects.create(username="ocu", password="test", email="ocu@test.it")
+        emails = [OutgoingEmail.objects.create(user=u, recipient=u.email, subject="claimed %d" % i) for i in range(3)]
+        OutgoingEmail.objects.filter(pk=emails[0].pk).update(worker="other", claimed_at=datetime.now())
+        connection = FailingConnection()
+        self.assertRaises(IOError, OutgoingEmail.objects.flush, connection)
+        self.assertEqual([m.subject for m in connection.sent], ["claimed 1"])
+        remaining = OutgoingEmail.objects.filter(user=u)
+        self.assertEqual(sorted(remaining.values_list('subject', flat=True)), ["claimed 0", "claimed 2"])
+        self.assertEqual(remaining.get(pk=emails[2].pk).claimed_at, None)
+        remaining.delete()
+
+    def test_connection(self):
+        u = User.objects.create(username="ocn", password="test", email="ocn@test.it")
+        for i in range(3):
+            OutgoingEmail.objects.create(user=u, recipient=u.email, subject="connection %d" % i)
+        email_backend = settings.EMAIL_BACKEND
+        settings.EMAIL_BACKEND = "prometeo.core.notifications.tests.signals.RecordingBackend"
+        try:
+            self.assertEqual(OutgoingEmail.objects.flush(), 3)
+        finally:
+            settings.EMAIL_BACKEND = email_backend
+        self.assertEqual(RecordingBackend.calls, ["open", "send", "send", "send", "close"])
+
+class TimelineTestCase(TestCase):
+    def test_pages(self):
+        u = User.objects.create(username="tl", password="test", email="tl@test.it")
+        s1 = Stream.objects.create(slug="timeline_stream_1")
+        s2 = Stream.objects.create(slug="timeline_stream_2")
+        s1.linked_streams.add(s2)
+        s2.followers.add(u)
+        activities = []
+        for i in range(5):
+            a = Activity.objects.create(title="tl %d" % i, signature="tl", template="notifications/activities/object-deleted.html", context="{}")
+            a.streams.add(s1)
+            activities.append(a)
+        Job.objects.run_pending()
+        TimelineEntry.objects.filter(activity__in=activities[1:4]).update(created=activities[1].created)
+        self.assertEqual(TimelineEntry.objects.filter(user=u).count(), 5)
+        pages, cursor = [], None
+        while True:
+            page, cursor = TimelineEntry.objects.page(u, cursor, limit=2)
+            pages.append(page)
+            if not cursor:
+                break
+        self.assertEqual([len(p) for p in pages], [2, 2, 1])
+        self.assertEqual(sorted([a.pk for p in pages for a in p]), sorted([a.pk for a in activities]))
+        self.assertRaises(ValueError, TimelineEntry.objects.page, u, "foo")
+
+class NotificationTestCase(TestCase):
+    def test_insert_missing(self):
+        signature, is_new = Signature.objects.get_or_create(slug="redelivery", title="Redelivery")
+        u1 = User.objects.create(username="rd1", password="test", email="rd1@test.it")
+        u2 = User.objects.create(username="rd2", password="test", email="rd2@test.it")
+        n = Notification.objects.create(title="rd", user=u1, signature=signature)
+        self.assertEqual(len(n.dispatch_uid), 32)
+        inserted = Notification.objects.insert_missing([Notification(title="rd", user=u, signature=signature, dispatch_uid=n.dispatch_uid) for u in (u1, u2)])
+        self.assertEqual([i.user_id for i in inserted], [u2.pk])
+        self.assertEqual(Notification.objects.insert_missing(inserted), [])
+        self.assertEqual(Notification.objects.filter(dispatch_uid=n.dispatch_uid).count(), 2)
+
+class NotificationCounterTestCase(TestCase):
+    def test_counter(self):
+        signature, is_new = Signature.objects.get_or_create(slug="counter", title="Counter")
+        u = User.objects.create(username="nc", password="test", email="nc@test.it")
+        Subscription.objects.create(user=u, signature=signature, send_email=False)
+        n1 = Notification.objects.create(title="n1", user=u, signature=signature, dispatch_uid="nc1")
+        self.assertEqual(NotificationCounter.objects.unread(u), 1)
+        n2 = Notification.objects.create(title="n2", user=u, signature=signature, dispatch_uid="nc2")
+        s = Stream.objects.create(slug="counter_stream")
+        s.followers.add(u)
+        a = Activity.objects.create(title="counter", signature="counter", template="notifications/activities/object-deleted.html", context="{}")
+        a.streams.add(s)
+        Job.objects.run_pending()
+        self.assertEqual(NotificationCounter.objects.unread(u), 3)
+        n1.mark_read()
+        n1.mark_read()
+        Notification.objects.get(pk=n1.pk).mark_read()
+        self.assertEqual(NotificationCounter.objects.unread(u), 2)
+        n1.delete()
+        n2.delete()
+        self.assertEqual(NotificationCounter.objects.unread(u), 1)
+        NotificationCounter.objects.filter(user=u).update(unread=10)
+        NotificationCounter.objects.rebuild()
+        self.assertEqual(NotificationCounter.objects.unread(u), 1)
+
+class RetentionTestCase(TestCase):
+    def test_prune(self):
+        signature, is_new = Signature.objects.get_or_create(slug="retention", title="Retention")
+        u = User.objects.create(username="rt", password="test", email="rt@test.it")
+        Subscription.objects.create(user=u, signature=signature, send_email=False)
+        s1 = Stream.objects.create(slug="retention_stream_1")
+        s2 = Stream.objects.create(slug="retention_stream_2")
+        s1.followers.add(u)
+        old = Activity.objects.create(title="old", signature="retention", template="notifications/activities/object-deleted.html", context="{}")
+        new = Activity.objects.create(title="new", signature="retention", template="notifications/activities/object-deleted.html", context="{}")
+        shared = Activity.objects.create(title="shared", signature="retention", template="notifications/activities/object-deleted.html", context="{}")
+        old.streams.add(s1)
+        new.streams.add(s1)
+        shared.streams.add(s1, s2)
+        Job.objects.run_pending()
+        a_month_ago = datetime.now() - timedelta(days=30)
+        Activity.objects.filter(pk=old.pk).update(created=a_month_ago)
+        Notification.objects.filter(dispatch_uid="%d" % old.pk).update(created=a_month_ago)
+        self.assertEqual(NotificationCounter.objects.unread(u), 3)
+        settings.ACTIVITY_RETENTION_DAYS_BY_SIGNATURE = settings.NOTIFICATION_RETENTION_DAYS_BY_SIGNATURE = {"retention": 7}
+        try:
+            self.assertEqual(list(Activity.objects.expired().values_list('pk', flat=True)), [old.pk])
+            Notification.objects.delete_batch(list(Notification.objects.expired().values_list('pk', flat=True)))
+            Activity.objects.delete_batch(list(Activity.objects.expired().values_list('pk', flat=True)))
+        finally:
+            settings.ACTIVITY_RETENTION_DAYS_BY_SIGNATURE = settings.NOTIFICATION_RETENTION_DAYS_BY_SIGNATURE = {}
+        self.assertEqual(NotificationCounter.objects.unread(u), 2)
+        self.assertEqual(TimelineEntry.objects.filter(user=u).count(), 2)
+        self.assertEqual(set(s1.activity_set.all()), set([new, shared]))
+        s1.delete()
+        self.assertEqual(list(Activity.objects.filter(pk__in=[new.pk, shared.pk])), [shared])
+        Activity.streams.through.objects.filter(activity=shared).delete()
+        self.assertTrue(shared in Activity.objects.orphans())
+
+class CallerTransactionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="ctu", password="test", email="ctu@test.it")
+        self.activity = Activity.objects.create(title="kept", signature="kept", template="notifications/activities/object-deleted.html", context="{}")
+
+    def tearDown(self):
+        Activity.objects.filter(pk=self.activity.pk).delete()
+        NotificationCounter.objects.filter(user=self.user).delete()
+        self.user.delete()
+
+    def test_delete_batch(self):
+        @transaction.commit_manually
+        def caller():
+            Activity.objects.delete_batch([self.activity.pk])
+            transaction.rollback()
+
+        caller()
+        self.assertTrue(Activity.objects.filter(pk=self.activity.pk).exists())
+        Activity.objects.delete_batch([self.activity.pk])
+        self.assertFalse(Activity.objects.filter(pk=self.activity.pk).exists())
+
+    def test_rebuild(self):
+        NotificationCounter.objects.create(user=self.user, unread=10)
+
+        @transaction.commit_manually
+        def caller():
+            NotificationCounter.objects.rebuild([self.user.pk])
+            transaction.rollback()
+
+        caller()
+        self.assertEqual(NotificationCounter.objects.unread(self.user), 10)
+        NotificationCounter.objects.rebuild([self.user.pk])
+        self.assertEqual(NotificationCounter.objects.unread(self.user), 0)
+
+class ObservableTestCase(TestCase):
+    def test_changes(self):
+        make_observable(Event)
+        u1 = User.objects.create(username="obs1", password="test", email="obs1@test.it")
+        u2 = User.objects.create(username="obs2", password="test", email="obs2@test.it")
+        e = Event(title="Meeting", start=datetime.now(), author=u1)
+        e.save()
+        e = Event.objects.get(pk=e.pk)
+        self.assertEqual(e.get_changes(), {})
+        e.title = "Party"
+        e.author = u2
+        changes = e.get_changes()
+        self.assertEqual(changes[u"title"], (u"Meeting", u"Party"))
+        self.assertTrue(u"obs1" in changes[u"created by"][0])
+        self.assertTrue(u"obs2" in changes[u"created by"][1])
+        e.save()
+        self.assertEqual(e.get_changes(), {})
@@ -28,8 +28,12 @@ urlpatterns = patterns('prometeo.core.notifications.views',
     url(r'^streams/follow/(?P<slug>[-\w]+)/?next=(?P<path>[\d\w\-\_\/]+)$', view='streams.stream_follow', name='stream_follow'),
     url(r'^streams/leave/(?P<slug>[-\w]+)/?next=(?P<path>[\d\w\-\_\/]+)$', view='streams.stream_leave', name='stream_leave'),
 
+    # Timelines.
+    url(r'^users/(?P<username>[\w\d\@\.\+\-\_]+)/timeline/$', view='timelines.timeline', name='timeline'),
+
     # Notifications.
     url(r'^users/(?P<username>[\w\d\@\.\+\-\_]+)/notifications/$', view='notifications.notification_list', name='notification_list'),
+    url(r'^users/(?P<username>[\w\d\@\.\+\-\_]+)/notifications/unread/$', view='notifications.notification_unread_count', name='notification_unread_count'),
     url(r'^users/(?P<username>[\w\d\@\.\+\-\_]+)/notifications/(?P<id>\d+)/$', view='notifications.notification_detail', name='notification_detail'),
     url(r'^users/(?P<username>[\w\d\@\.\+\-\_]+)/notifications/(?P<id>\d+)/delete/$', view='notifications.notification_delete', name='notification_delete'),
 )
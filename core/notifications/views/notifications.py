@@ -20,12 +20,13 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from datetime import datetime
 
 from django.shortcuts import render_to_response, get_object_or_404
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import list_detail, create_update
 from django.views.generic.simple import redirect_to
+from django.http import HttpResponse
+import django.utils.simplejson as json
 from django.core.urlresolvers import reverse
 from django.template import RequestContext
 from django.contrib.auth.models import User
@@ -33,8 +34,8 @@ from django.contrib import messages
 from django.conf import settings
 
 from prometeo.core.auth.views import _get_user
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail
 
 from ..models import *
 from ..forms import *
@@ -49,7 +50,7 @@ def _get_notification(request, *args, **kwargs):
 def notification_list(request, username, page=0, paginate_by=10, **kwargs):
     """Displays the list of all filtered notifications.
     """
-    user = get_object_or_404(User, username=username)
+    user = get_cached_obj(request, _get_user, username=username, **kwargs)
     
     if request.method == 'POST':
         form = SubscriptionsForm(request.POST, user=user)
@@ -76,24 +77,30 @@ def notification_list(request, username, page=0, paginate_by=10, **kwargs):
         **kwargs
     )
 
+@permission_required('auth.change_user', _get_user)
+def notification_unread_count(request, username, **kwargs):
+    """Returns the number of unread notifications of the given user as JSON.
+    """
+    user = get_cached_obj(request, _get_user, username=username, **kwargs)
+
+    return HttpResponse(json.dumps({'unread': NotificationCounter.objects.unread(user)}), mimetype='application/json')
+
 @permission_required('auth.view_user', _get_user)
 @permission_required('notifications.view_notification', _get_notification)
 def notification_detail(request, username, id, **kwargs):
     """Displays the details of the selected notification.
     """
-    user = get_object_or_404(User, username=username)
-    notification = get_object_or_404(Notification, pk=id, user=user)
+    user = get_cached_obj(request, _get_user, username=username, id=id, **kwargs)
+    notification = get_cached_obj(request, _get_notification, username=username, id=id, **kwargs)
 
-    if request.user == notification.user:
-        notification.read = datetime.now()
-        notification.save()
+    if request.user.pk == notification.user_id:
+        notification.mark_read()
 
     object_list = Notification.objects.filter(user=user)
 
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        object_id=id,
-        queryset=object_list,
+        notification,
         template_name='notifications/notification_detail.html',
         extra_context={'object_list': object_list},
         **kwargs
@@ -104,8 +111,8 @@ def notification_detail(request, username, id, **kwargs):
 def notification_delete(request, username, id, **kwargs):
     """Deletes an existing notification for the current user.
     """
-    user = get_object_or_404(User, username=username)
-    notification = get_object_or_404(Notification, pk=id, user=user)
+    user = get_cached_obj(request, _get_user, username=username, id=id, **kwargs)
+    notification = get_cached_obj(request, _get_notification, username=username, id=id, **kwargs)
 
     return create_update.delete_object(
         request,
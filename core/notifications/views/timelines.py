@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.shortcuts import render_to_response
+from django.template import RequestContext
+from django.http import Http404
+
+from prometeo.core.auth.views import _get_user
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+
+from ..models import *
+
+@permission_required('auth.change_user', _get_user)
+def timeline(request, username, **kwargs):
+    """Displays the activities of the streams followed by the given user.
+
+    Older activities are loaded passing the "before" cursor of the last page.
+    """
+    user = get_cached_obj(request, _get_user, username=username)
+
+    try:
+        object_list, next_cursor = TimelineEntry.objects.page(user, request.GET.get('before', None))
+    except ValueError:
+        raise Http404
+
+    return render_to_response('notifications/timeline.html', RequestContext(request, {'object': user, 'object_list': object_list, 'next_cursor': next_cursor}))
@@ -22,6 +22,8 @@ __version__ = '0.0.5'
 
 import random
 
+from prometeo.core.widgets.loading import registry
+
 from models import Category, Tag
 
 def categories(context):
@@ -44,3 +46,6 @@ def tag_cloud(context):
         final_tags.append(valid_tags.pop(index))
     context['tags'] = final_tags
     return context
+
+registry.register_dependencies(categories, Category)
+registry.register_dependencies(tag_cloud, Tag)
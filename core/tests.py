@@ -22,3 +22,66 @@ __version__ = '0.0.5'
 
 from prometeo.core.widgets.tests import *
 from prometeo.core.auth.tests import *
+
+from django.utils import unittest
+from django.db import transaction
+from django.contrib.auth.models import Group
+from django.conf import settings
+
+from prometeo.core.models import Job
+
+job_calls = []
+
+def record_job_call(value, fail=False):
+    job_calls.append(value)
+    if fail:
+        raise ValueError(value)
+
+def create_group_and_fail(name):
+    Group.objects.create(name=name)
+    raise ValueError(name)
+
+class JobTestCase(unittest.TestCase):
+    def setUp(self):
+        del job_calls[:]
+
+    def test_run(self):
+        job = Job.objects.enqueue(record_job_call, "ok")
+        self.assertEqual(job.status, "PENDING")
+        self.assertEqual(job_calls, [])
+        Job.objects.run_pending()
+        self.assertEqual(job_calls, ["ok"])
+        self.assertEqual(Job.objects.filter(pk=job.pk).count(), 0)
+
+    def test_retry(self):
+        job = Job.objects.enqueue(record_job_call, "ko", fail=True)
+        Job.objects.run_pending()
+        job = Job.objects.get(pk=job.pk)
+        self.assertEqual(job.status, "PENDING")
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue("ValueError" in job.error)
+        self.assertEqual(Job.objects.claim("test"), [])
+        job.attempts = 4
+        job.run()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, "FAILED")
+
+    def test_failed_attempt_is_rolled_back(self):
+        job = Job.objects.enqueue(create_group_and_fail, "rolled back job")
+        Job.objects.run_pending()
+        self.assertEqual(Job.objects.get(pk=job.pk).attempts, 1)
+        self.assertFalse(Group.objects.filter(name="rolled back job").exists())
+
+    def test_eager_job_joins_caller_transaction(self):
+        @transaction.commit_manually
+        def caller():
+            Group.objects.create(name="eager job caller")
+            Job.objects.enqueue(record_job_call, "eager")
+            transaction.rollback()
+
+        settings.JOB_QUEUE_EAGER = True
+        try:
+            caller()
+        finally:
+            settings.JOB_QUEUE_EAGER = False
+        self.assertEqual(job_calls, ["eager"])
+        self.assertFalse(Group.objects.filter(name="eager job caller").exists())
@@ -199,3 +199,36 @@ def assign_code(instance, queryset=None, code_field_name='code', order_field_nam
         except:
             pass
         setattr(instance, code_field_name, '%d-%s' % (uid, year))
+
+def update_fields(instance, **values):
+    """Sets the given <values> on <instance> and stores them with a single UPDATE.
+
+    Unlike save(), no signal is sent.
+    """
+    for name, value in values.items():
+        setattr(instance, name, value)
+    if isinstance(instance, models.Model) and instance.pk:
+        instance.__class__._default_manager.filter(pk=instance.pk).update(**values)
+
+_provisioners = {}
+
+def register_provisioner(cls, field_name, provisioner):
+    """Registers a <provisioner> for the <field_name> related object of <cls>.
+
+    When a <cls> instance is saved without the related object, it's returned
+    by provisioner(sender, instance). All the related objects provisioned for
+    an instance are stored with a single UPDATE.
+    """
+    provisioners = _provisioners.setdefault(cls, SortedDict())
+    provisioners[field_name] = provisioner
+    models.signals.post_save.connect(provision, cls, dispatch_uid="%s.%s_provisioning" % (cls._meta.app_label, cls._meta.object_name))
+
+def provision(sender, instance, *args, **kwargs):
+    """Provides the missing related objects of the given instance.
+    """
+    values = {}
+    for field_name, provisioner in _provisioners.get(sender, {}).items():
+        if getattr(instance, instance._meta.get_field(field_name).attname) is None:
+            values[field_name] = provisioner(sender, instance)
+    if values:
+        update_fields(instance, **values)
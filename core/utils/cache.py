@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import time
+
+from django.core.cache import cache
+from django.conf import settings
+
+def new_version():
+    """Returns a fresh version for a version key.
+
+    A time-based value avoids resurrecting stale entries when a version key
+    is evicted and then recreated.
+    """
+    return int(time.time() * 1000)
+
+def get_versions(keys):
+    """Returns the current values of the given version keys, creating the missing ones.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version())
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+def bump_version(key):
+    """Changes the value of the given version key.
+
+    All the entries keyed by its previous value are invalidated.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version())
+
+class CacheStats(object):
+    """Mix-in which counts the hits and misses of a cache.
+
+    The counters of each process are added to shared counters in the cache
+    backend every CACHE_STATS_FLUSH_INTERVAL lookups, so "manage.py
+    cachestats" can report the totals of all the processes.
+    """
+    stats_name = None
+    hits = 0
+    misses = 0
+    _unflushed_hits = 0
+    _unflushed_misses = 0
+
+    def _stats_key(self, counter):
+        return "stats:%s:%s" % (self.stats_name, counter)
+
+    def count_lookup(self, value):
+        """Counts a lookup which returned "value" (None is a miss) and returns it.
+        """
+        if value is None:
+            self.misses += 1
+            self._unflushed_misses += 1
+        else:
+            self.hits += 1
+            self._unflushed_hits += 1
+        if self._unflushed_hits + self._unflushed_misses >= getattr(settings, 'CACHE_STATS_FLUSH_INTERVAL', 100):
+            self.flush_stats()
+        return value
+
+    def flush_stats(self):
+        """Adds the counters of this process to the shared ones.
+        """
+        for counter in ('hits', 'misses'):
+            count = getattr(self, '_unflushed_%s' % counter)
+            if count:
+                key = self._stats_key(counter)
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count)
+                setattr(self, '_unflushed_%s' % counter, 0)
+
+    def shared_stats(self):
+        """Returns the hits and misses of all the processes.
+        """
+        self.flush_stats()
+        keys = [self._stats_key(c) for c in ('hits', 'misses')]
+        values = cache.get_many(keys)
+        return self._make_stats(values.get(keys[0], 0), values.get(keys[1], 0))
+
+    def reset_shared_stats(self):
+        cache.delete_many([self._stats_key(c) for c in ('hits', 'misses')])
+
+    def stats(self):
+        """Returns the hits and misses of this process.
+        """
+        return self._make_stats(self.hits, self.misses)
+
+    def _make_stats(self, hits, misses):
+        total = hits + misses
+        ratio = 0.0
+        if total:
+            ratio = float(hits) / total
+        return {'hits': hits, 'misses': misses, 'ratio': ratio}
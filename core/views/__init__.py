@@ -20,8 +20,10 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
 from django.views.generic import list_detail
+from django.template import loader, RequestContext
+from django.core.xheaders import populate_xheaders
 from django.utils.translation import check_for_language, activate
 from django.conf import settings
 
@@ -67,3 +69,22 @@ def filtered_list_detail(request, model_or_queryset, fields=[], exclude=[], page
         extra_context=extra_context,
         **kwargs
     )
+
+def object_detail(request, obj, template_name=None, extra_context=None, template_object_name='object', mimetype=None):
+    """Displays the details of an object which has been already fetched.
+
+    It works like "list_detail.object_detail", without querying the object
+    again.
+    """
+    opts = obj._meta
+    if not template_name:
+        template_name = "%s/%s_detail.html" % (opts.app_label, opts.object_name.lower())
+    c = RequestContext(request, {template_object_name: obj})
+    for key, value in (extra_context or {}).items():
+        if callable(value):
+            c[key] = value()
+        else:
+            c[key] = value
+    response = HttpResponse(loader.render_to_string(template_name, context_instance=c), mimetype=mimetype)
+    populate_xheaders(request, response, obj.__class__, obj.pk)
+    return response
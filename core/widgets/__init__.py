@@ -20,4 +20,9 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
+from django.conf import settings
+
 from base import *
+
+if __name__ in settings.INSTALLED_APPS:
+    from signals import *
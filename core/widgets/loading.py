@@ -21,13 +21,52 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 import types
+import hashlib
+from datetime import date
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+import django.utils.simplejson as json
+
+from prometeo.core.utils.cache import get_versions, bump_version, CacheStats
+
+def _model_version_key(model):
+    return "widgets:model:%s.%s:version" % (model._meta.app_label, model._meta.object_name.lower())
+
+def invalidate_widget_fragments(sender, *args, **kwargs):
+    """Invalidates the cached output of the widgets depending on the changed model.
+
+    The first call discovers the widget sources, so the dependencies they
+    declare are known even if no widget has been rendered yet.
+    """
+    changed = [sender]
+    if 'action' in kwargs:
+        if not kwargs['action'].startswith('post_'):
+            return
+        changed = [kwargs['instance'].__class__, kwargs['model']]
+    for model in changed:
+        if model in registry.dependency_models:
+            bump_version(_model_version_key(model))
+
+class WidgetCache(CacheStats):
+    """Registry of the widget sources.
+
+    Source callables are resolved once per process, and the parsed contexts
+    of the widgets are kept until the widget (or its template) changes. The
+    widget lists of the regions and the output of the widgets whose sources
+    declared their dependencies are stored in the cache backend.
+    """
+    regions_version_key = 'widgets:regions:version'
+    stats_name = 'widgets:fragments'
 
-class WidgetCache(object):
     def __init__(self):
         self.__discovered = False
         self.__sources = []
+        self.__callables = {}
+        self.__contexts = {}
+        self.__dependencies = {}
+        self.__dependency_models = set()
 
     def __get_sources(self):
         self.__discover_widgets()
@@ -44,12 +83,131 @@ class WidgetCache(object):
                 module_name = "%s.widgets" % app
                 module = __import__(module_name, {}, {}, ['*'])
                 for a in dir(module):
-                    if isinstance(module.__dict__.get(a), types.FunctionType):
+                    func = module.__dict__.get(a)
+                    if isinstance(func, types.FunctionType):
                         source = "%s.%s" % (module_name, a)
                         self.__sources.append((source, source))
+                        self.__callables[source] = func
             except ImportError:
                 pass
         self.__discovered = True
 
-registry = WidgetCache()
+    def get_callable(self, source):
+        """Returns the function with the given dotted path (or None).
+        """
+        self.__discover_widgets()
+        try:
+            return self.__callables[source]
+        except KeyError:
+            pkg, sep, name = source.rpartition('.')
+            try:
+                func = getattr(__import__(pkg, {}, {}, [name]), name)
+            except (ImportError, AttributeError, ValueError):
+                func = None
+            self.__callables[source] = func
+            return func
+
+    def get_context(self, widget):
+        """Returns the parsed context of the given widget, merged with the one of its template.
+        """
+        raw = (widget.template.context, widget.context)
+        try:
+            cached_raw, context = self.__contexts[widget.pk]
+            if cached_raw == raw:
+                return context
+        except KeyError:
+            pass
+        context = {}
+        for c in raw:
+            if c:
+                context.update(json.loads(c))
+        self.__contexts[widget.pk] = (raw, context)
+        return context
+
+    def clear_contexts(self, widget_ids=None):
+        """Forgets the parsed contexts of the given widgets (or all of them).
+        """
+        if widget_ids is None:
+            self.__contexts.clear()
+        else:
+            for pk in widget_ids:
+                self.__contexts.pop(pk, None)
+
+    def __get_dependency_models(self):
+        self.__discover_widgets()
+        return self.__dependency_models
+    dependency_models = property(__get_dependency_models)
 
+    def _get_regions_version(self):
+        return get_versions([self.regions_version_key])[0]
+
+    def get_region_widgets(self, slug):
+        """Returns the widgets of the given region, with their templates.
+
+        The list is loaded with a single query and then cached until a widget,
+        a widget template or a region changes.
+        """
+        key = "widgets:region:%s:%s" % (slug, self._get_regions_version())
+        widgets = cache.get(key)
+        if widgets is None:
+            from models import Widget
+            widgets = list(Widget.objects.filter(region__slug=slug).select_related('template').order_by('sort_order', 'title'))
+            cache.set(key, widgets, getattr(settings, 'WIDGET_REGION_CACHE_TIMEOUT', 3600))
+        return widgets
+
+    def get_widget(self, slug):
+        """Returns the widget with the given slug, with its template (or None).
+
+        The widget is cached, missing ones included, until a widget, a widget
+        template or a region changes.
+        """
+        key = "widgets:widget:%s:%s" % (slug, self._get_regions_version())
+        widget = cache.get(key)
+        if widget is None:
+            from models import Widget
+            try:
+                widget = Widget.objects.select_related('template').get(slug=slug)
+            except Widget.DoesNotExist:
+                widget = False
+            cache.set(key, widget, getattr(settings, 'WIDGET_REGION_CACHE_TIMEOUT', 3600))
+        return widget or None
+
+    def invalidate_regions(self):
+        """Invalidates the cached widget lists of all the regions.
+        """
+        bump_version(self.regions_version_key)
+
+    def register_dependencies(self, func, *dependencies):
+        """Caches the output of the widgets using the given source function.
+
+        The output is cached per widget, user, language and day, until one of
+        the given models (or its many-to-many relationships) changes.
+        """
+        self.__dependencies["%s.%s" % (func.__module__, func.__name__)] = dependencies
+        self.__dependency_models.update(dependencies)
+
+    def get_fragment_key(self, widget, context, template_name=None):
+        """Returns the cache key of the output of the given widget (or None).
+        """
+        self.__discover_widgets()
+        try:
+            dependencies = self.__dependencies[widget.template.source]
+        except KeyError:
+            return None
+        user = context.get('user', None)
+        obj = context.get('object', None)
+        if hasattr(obj, '_meta'):
+            obj = "%s.%s:%s" % (obj._meta.app_label, obj._meta.object_name, obj.pk)
+        else:
+            obj = None
+        keys = [self.regions_version_key] + [_model_version_key(m) for m in dependencies]
+        signature = (widget.pk, template_name, context.get('widget_index', None), getattr(user, 'pk', None), get_language(), date.today(), obj, get_versions(keys))
+        return "widgets:fragment:%s" % hashlib.md5(repr(signature)).hexdigest()
+
+    def get_fragment(self, key):
+        return self.count_lookup(cache.get(key))
+
+    def set_fragment(self, key, value):
+        cache.set(key, value, getattr(settings, 'WIDGET_FRAGMENT_CACHE_TIMEOUT', 3600))
+
+registry = WidgetCache()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import time
+import threading
+from Queue import Queue
+from copy import copy
+
+from django.db import connections
+from django.conf import settings
+from django.utils import translation
+from django.template.loader import render_to_string
+from django.core.urlresolvers import reverse
+from django.contrib.contenttypes.models import ContentType
+from django.utils.http import urlencode
+
+from loading import registry
+
+def render_widget(widget, context, template_name=None):
+    """Renders the given widget, running its source function on the context.
+
+    The output of the widgets whose sources declared their dependencies is
+    taken from the cache backend, when available.
+    """
+    key = registry.get_fragment_key(widget, context, template_name)
+    if key:
+        output = registry.get_fragment(key)
+        if output is not None:
+            return output
+
+    context = copy(context)
+    # Widget functions write into the top dict, so the cached one is copied.
+    context.update(dict(registry.get_context(widget)))
+    func = registry.get_callable(widget.template.source)
+    if func:
+        try:
+            context = func(context)
+        except:
+            pass
+    output = render_to_string(template_name or widget.template.template_name, {'widget': widget}, context)
+
+    if key:
+        registry.set_fragment(key, output)
+    return output
+
+def render_placeholder(widget, context):
+    """Renders the placeholder shown in place of the given widget.
+    """
+    return render_to_string("widgets/widget_placeholder.html", {'widget': widget}, copy(context))
+
+def render_deferred(widget, context, index):
+    """Renders a placeholder which loads the given widget after the page.
+    """
+    params = {'index': index}
+    obj = context.get('object', None)
+    if hasattr(obj, '_meta') and obj.pk:
+        params['object'] = "%d-%s" % (ContentType.objects.get_for_model(obj).pk, obj.pk)
+    url = "%s?%s" % (reverse('widget_render', args=[widget.slug]), urlencode(params))
+    context = copy(context)
+    context.update({'widget_index': index, 'widget_url': url})
+    return render_to_string("widgets/widget_deferred.html", {'widget': widget}, context)
+
+class _WidgetTask(object):
+    def __init__(self, widget, context):
+        self.widget = widget
+        self.context = context
+        self.output = None
+        self.started = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+def _render_tasks(queue, language):
+    translation.activate(language)
+    try:
+        while True:
+            task = queue.get()
+            if task is None:
+                break
+            with task.lock:
+                if task.cancelled:
+                    continue
+                task.started = time.time()
+            try:
+                task.output = render_widget(task.widget, task.context)
+            except:
+                # Broken widgets are replaced by a placeholder.
+                pass
+            task.done.set()
+    finally:
+        translation.deactivate()
+        # Each thread has its own database connections.
+        for connection in connections.all():
+            connection.close()
+
+def _wait_task(task, submitted, timeout):
+    """Waits for the given task, for at most "timeout" seconds since it started.
+
+    Returns False (and cancels the task, if it's still queued) on timeout.
+    """
+    while not task.done.is_set():
+        remaining = (task.started or submitted) + timeout - time.time()
+        if remaining <= 0:
+            with task.lock:
+                if task.started is None:
+                    task.cancelled = True
+                    return False
+                if task.started + timeout <= time.time():
+                    return False
+            continue
+        task.done.wait(remaining)
+    return True
+
+def render_widgets(widgets, context):
+    """Renders the given widgets, returning their outputs in the same order.
+
+    If WIDGET_DEFERRED_RENDERING is True, only placeholders are rendered and
+    each widget is loaded by the browser from the "widget_render" view.
+
+    If WIDGET_CONCURRENT_RENDERING is True, the widgets are rendered by a pool
+    of WIDGET_RENDERING_THREADS threads, and the ones not rendered within
+    WIDGET_RENDERING_TIMEOUT seconds are replaced by a placeholder.
+    """
+    if getattr(settings, 'WIDGET_DEFERRED_RENDERING', False):
+        return [render_deferred(widget, context, index) for index, widget in enumerate(widgets)]
+
+    if not getattr(settings, 'WIDGET_CONCURRENT_RENDERING', False) or len(widgets) < 2:
+        outputs = []
+        for index, widget in enumerate(widgets):
+            context['widget_index'] = index
+            outputs.append(render_widget(widget, context))
+        return outputs
+
+    tasks = []
+    for index, widget in enumerate(widgets):
+        widget_context = copy(context)
+        widget_context.update({'widget_index': index})
+        tasks.append(_WidgetTask(widget, widget_context))
+
+    queue = Queue()
+    for task in tasks:
+        queue.put(task)
+    size = min(getattr(settings, 'WIDGET_RENDERING_THREADS', 4), len(tasks))
+    for i in range(size):
+        queue.put(None)
+        thread = threading.Thread(target=_render_tasks, args=(queue, translation.get_language()))
+        thread.daemon = True
+        thread.start()
+
+    outputs = []
+    submitted = time.time()
+    timeout = getattr(settings, 'WIDGET_RENDERING_TIMEOUT', 5)
+    for task in tasks:
+        if _wait_task(task, submitted, timeout) and task.output is not None:
+            outputs.append(task.output)
+        else:
+            outputs.append(render_placeholder(task.widget, task.context))
+    return outputs
@@ -23,27 +23,48 @@ __version__ = '0.0.5'
 from django.db import models
 from django.utils.translation import ugettext_noop as _
 
+from prometeo.core.utils import update_fields, register_provisioner
+
 from models import *
+from loading import registry, invalidate_widget_fragments
 
 ## UTILS ##
 
 def manage_dashboard(cls):
     """Connects handlers for dashboard management.
     """
-    models.signals.post_save.connect(create_dashboard, cls)
+    register_provisioner(cls, "dashboard", allocate_dashboard)
     models.signals.post_delete.connect(delete_dashboard, cls)
 
+def allocate_dashboard(sender, instance):
+    """Returns a new (empty) dashboard for the given object.
+    """
+    dashboard, is_new = Region.objects.get_or_create(slug="%s_%d_dashboard" % (sender.__name__.lower(), instance.pk), description=_("Dashboard"))
+    if not is_new:
+        for w in dashboard.widgets.all():
+            w.delete()
+    return dashboard
+
 ## HANDLERS ##
 
 def create_dashboard(sender, instance, *args, **kwargs):
     """Creates a new dashboard for the given object.
     """
     if hasattr(instance, "dashboard") and not instance.dashboard:
-        instance.dashboard, is_new = Region.objects.get_or_create(slug="%s_%d_dashboard" % (sender.__name__.lower(), instance.pk), description=_("Dashboard"))
-        if not is_new:
-            for w in instance.dashboard.widgets.all():
-                w.delete()
-        instance.save()
+        update_fields(instance, dashboard=allocate_dashboard(sender, instance))
+
+def clear_widget_contexts(sender, instance, *args, **kwargs):
+    """Forgets the parsed contexts of the changed widget (or widget template).
+    """
+    if isinstance(instance, WidgetTemplate):
+        registry.clear_contexts(instance.instances.values_list('pk', flat=True))
+    else:
+        registry.clear_contexts([instance.pk])
+
+def invalidate_regions(sender, instance, *args, **kwargs):
+    """Invalidates the cached widget lists of the regions.
+    """
+    registry.invalidate_regions()
 
 def delete_dashboard(sender, instance, *args, **kwargs):
     """Deletes the dashboard of the given object.
@@ -52,3 +73,22 @@ def delete_dashboard(sender, instance, *args, **kwargs):
     if dashboard:
         dashboard.delete()
         instance.dashboard = None
+
+## CONNECTIONS ##
+
+models.signals.post_save.connect(clear_widget_contexts, Widget, dispatch_uid="clear_widget_contexts_on_save")
+models.signals.post_delete.connect(clear_widget_contexts, Widget, dispatch_uid="clear_widget_contexts_on_delete")
+models.signals.post_save.connect(clear_widget_contexts, WidgetTemplate, dispatch_uid="clear_widget_template_contexts_on_save")
+models.signals.pre_delete.connect(clear_widget_contexts, WidgetTemplate, dispatch_uid="clear_widget_template_contexts_on_delete")
+
+models.signals.post_save.connect(invalidate_regions, Widget, dispatch_uid="invalidate_regions_on_widget_save")
+models.signals.post_delete.connect(invalidate_regions, Widget, dispatch_uid="invalidate_regions_on_widget_delete")
+models.signals.post_save.connect(invalidate_regions, WidgetTemplate, dispatch_uid="invalidate_regions_on_widget_template_save")
+models.signals.post_delete.connect(invalidate_regions, WidgetTemplate, dispatch_uid="invalidate_regions_on_widget_template_delete")
+models.signals.post_delete.connect(invalidate_regions, Region, dispatch_uid="invalidate_regions_on_region_delete")
+
+# Connected to all models at load time, so every process invalidates the
+# widget output, even if it never renders (and so never discovers) widgets.
+models.signals.post_save.connect(invalidate_widget_fragments, dispatch_uid="invalidate_widget_fragments_on_save")
+models.signals.post_delete.connect(invalidate_widget_fragments, dispatch_uid="invalidate_widget_fragments_on_delete")
+models.signals.m2m_changed.connect(invalidate_widget_fragments, dispatch_uid="invalidate_widget_fragments_on_m2m_changed")
@@ -20,15 +20,10 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-import re
-
 from django import template
-from django.utils.translation import ugettext as _
-from django.template.loader import render_to_string
-from django.core.exceptions import ObjectDoesNotExist
 
-from ..models import Region
-from widget import WidgetNode
+from ..loading import registry
+from ..rendering import render_widgets
 
 register = template.Library()
 
@@ -37,17 +32,7 @@ class RegionNode(template.Node):
         self.slug = slug
 
     def render(self, context):
-        output = ''
-        slug = self.slug.resolve(context)
-        try:
-            region = Region.objects.get(slug=slug)
-        except Region.DoesNotExist:
-            region = None
-        if region:
-            for index, widget in enumerate(region.widgets.all()):
-                context['widget_index'] = index
-                output += WidgetNode(widget.slug).render(context)
-        return output
+        return ''.join(render_widgets(registry.get_region_widgets(self.slug.resolve(context)), context))
 
 @register.tag
 def region(parser, token):
@@ -20,46 +20,23 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-import re
-from copy import copy
-
 from django import template
-from django.utils.translation import ugettext as _
-from django.template.loader import render_to_string
-from django.core.exceptions import ObjectDoesNotExist
-import django.utils.simplejson as json
 
-from ..models import Widget
+from ..loading import registry
+from ..rendering import render_widget
 
 register = template.Library()
 
 class WidgetNode(template.Node):
     def __init__(self, widget_slug, template=None):
+        self.widget_slug = widget_slug
         self.template = template
-        try:
-            self.widget = Widget.objects.get(slug=widget_slug)
-            if self.template is None:
-                self.template = self.widget.template
-        except ObjectDoesNotExist:
-            self.widget = None
 
     def render(self, context):
-        output = ''
-        context = copy(context)
-        if self.widget:
-            if self.widget.template.context:
-                context.update(json.loads(self.widget.template.context))
-            if self.widget.context:
-                context.update(json.loads(self.widget.context))
-            pkg, sep, name = self.widget.template.source.rpartition('.')
-            try:
-                m = __import__(pkg, {}, {}, [name])
-                func = getattr(m, name)
-                context = func(context)
-            except:
-                pass
-            output += render_to_string(self.template.template_name, {'widget': self.widget}, context)
-        return output
+        widget = registry.get_widget(self.widget_slug)
+        if widget is None:
+            return ''
+        return render_widget(widget, context, self.template)
         
 @register.tag
 def widget(parser, token):
@@ -21,3 +21,6 @@ __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
 from signals import *
+from loading import *
+from rendering import *
+from views import *
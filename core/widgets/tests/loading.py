@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import sys
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.template import Template, Context
+from django.db import connection
+from django.contrib.auth.models import User, Group
+
+from prometeo.core.widgets.base import dummy
+
+from ..models import *
+from prometeo.core.taxonomy.models import Category
+
+from .. import loading
+from ..loading import registry, WidgetCache
+
+widget_calls = []
+
+def counted_widget(context):
+    widget_calls.append(context.get('user'))
+    context['text'] = "%d groups" % Group.objects.count()
+    return context
+
+registry.register_dependencies(counted_widget, Group)
+
+class WidgetCacheTestCase(TestCase):
+    def test_callables(self):
+        self.assertEqual(registry.get_callable("prometeo.core.widgets.base.dummy"), dummy)
+        self.assertEqual(registry.get_callable("prometeo.core.widgets.base.missing"), None)
+        self.assertEqual(registry.get_callable("missing"), None)
+
+    def test_contexts(self):
+        region, is_new = Region.objects.get_or_create(slug="widget_cache_region")
+        template = WidgetTemplate.objects.create(title="Cached", slug="cached", source="prometeo.core.widgets.base.dummy", context='{"a": 1, "b": 1}')
+        widget = Widget.objects.create(title="Cached", slug="cached", region=region, template=template, context='{"b": 2}')
+        context = registry.get_context(widget)
+        self.assertEqual(context, {"a": 1, "b": 2})
+        self.assertTrue(registry.get_context(Widget.objects.get(pk=widget.pk)) is context)
+        template.context = '{"a": 3}'
+        template.save()
+        self.assertEqual(registry.get_context(Widget.objects.get(pk=widget.pk)), {"a": 3, "b": 2})
+        output = Template('{% load widget %}{% widget "cached" "widgets/widget.html" %}').render(Context({}))
+        self.assertTrue("Cached" in output)
+        old_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            Template('{% load widget %}{% widget "cached" "widgets/widget.html" %}{% widget "missing" %}').render(Context({}))
+            Template('{% load widget %}{% widget "missing" %}').render(Context({}))
+            self.assertEqual(len(connection.queries) - start, 1)
+        finally:
+            connection.use_debug_cursor = old_debug_cursor
+
+    def test_region_widgets(self):
+        region, is_new = Region.objects.get_or_create(slug="widget_cache_region_list")
+        template = WidgetTemplate.objects.create(title="Listed", slug="listed", source="prometeo.core.widgets.base.dummy")
+        for i in (2, 1, 3):
+            Widget.objects.create(title="Listed %d" % i, slug="listed_%d" % i, region=region, template=template, sort_order=i)
+        old_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            widgets = registry.get_region_widgets(region.slug)
+            self.assertEqual([w.slug for w in widgets], ["listed_1", "listed_2", "listed_3"])
+            self.assertEqual(set([w.template.slug for w in widgets]), set(["listed"]))
+            self.assertEqual(len(connection.queries) - start, 1)
+            start = len(connection.queries)
+            output = Template('{% load region %}{% region "widget_cache_region_list" %}').render(Context({}))
+            self.assertEqual(len(connection.queries) - start, 0)
+        finally:
+            connection.use_debug_cursor = old_debug_cursor
+        self.assertTrue(output.index("Listed 1") < output.index("Listed 3"))
+        Widget.objects.filter(slug="listed_3").delete()
+        self.assertEqual(len(registry.get_region_widgets(region.slug)), 2)
+
+    def test_fragments(self):
+        region, is_new = Region.objects.get_or_create(slug="widget_cache_region_fragments")
+        template = WidgetTemplate.objects.create(title="Counted", slug="counted", source="prometeo.core.widgets.tests.loading.counted_widget")
+        Widget.objects.create(title="Counted", slug="counted", region=region, template=template)
+        u1 = User.objects.create(username="wf1", password="test", email="wf1@test.it")
+        u2 = User.objects.create(username="wf2", password="test", email="wf2@test.it")
+        t = Template('{% load region %}{% region "widget_cache_region_fragments" %}')
+        del widget_calls[:]
+        hits = registry.hits
+        output = t.render(Context({'user': u1}))
+        self.assertEqual(t.render(Context({'user': u1})), output)
+        self.assertEqual(registry.hits, hits + 1)
+        t.render(Context({'user': u2}))
+        self.assertEqual(widget_calls, [u1, u2])
+        Group.objects.create(name="widget_fragments")
+        self.assertNotEqual(t.render(Context({'user': u1})), output)
+        self.assertEqual(widget_calls, [u1, u2, u1])
+        u1.groups.add(Group.objects.get(name="widget_fragments"))
+        t.render(Context({'user': u1}))
+        self.assertEqual(len(widget_calls), 4)
+
+    def test_invalidation_before_discovery(self):
+        # Simulates a process which has not rendered (nor discovered) any widget yet.
+        module_name = "prometeo.core.taxonomy.widgets"
+        module = sys.modules.pop(module_name, None)
+        loading.registry = WidgetCache()
+        try:
+            key = loading._model_version_key(Category)
+            version = cache.get(key)
+            Category.objects.create(title="Invalidated before discovery", slug="invalidated-before-discovery")
+            self.assertNotEqual(cache.get(key), version)
+        finally:
+            loading.registry = registry
+            if module is not None:
+                sys.modules[module_name] = module
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+import time
+
+from django.test import TestCase
+from django.template import Context
+from django.conf import settings
+
+from ..models import *
+from ..loading import registry
+from ..rendering import render_widgets
+
+def slow_widget(context):
+    time.sleep(1)
+    return context
+
+class RenderingTestCase(TestCase):
+    def setUp(self):
+        self.settings = (settings.WIDGET_CONCURRENT_RENDERING, settings.WIDGET_RENDERING_THREADS, settings.WIDGET_RENDERING_TIMEOUT)
+        settings.WIDGET_CONCURRENT_RENDERING, settings.WIDGET_RENDERING_THREADS, settings.WIDGET_RENDERING_TIMEOUT = True, 2, 0.3
+
+    def tearDown(self):
+        settings.WIDGET_CONCURRENT_RENDERING, settings.WIDGET_RENDERING_THREADS, settings.WIDGET_RENDERING_TIMEOUT = self.settings
+
+    def test_concurrent_rendering(self):
+        region, is_new = Region.objects.get_or_create(slug="concurrent_region")
+        fast = WidgetTemplate.objects.create(title="Fast", slug="fast", source="prometeo.core.widgets.base.dummy")
+        slow = WidgetTemplate.objects.create(title="Slow", slug="slow", source="prometeo.core.widgets.tests.rendering.slow_widget")
+        for i, template in enumerate((fast, slow, fast)):
+            Widget.objects.create(title="Concurrent %d" % i, slug="concurrent_%d" % i, region=region, template=template, sort_order=i)
+        start = time.time()
+        outputs = render_widgets(registry.get_region_widgets(region.slug), Context({}))
+        self.assertTrue(time.time() - start < 1)
+        self.assertEqual(len(outputs), 3)
+        for i, output in enumerate(outputs):
+            self.assertTrue("Concurrent %d" % i in output)
+        self.assertTrue("not available" in outputs[1])
+        self.assertFalse("not available" in outputs[0] + outputs[2])
+        self.assertTrue("altwidget" in outputs[1])
@@ -20,7 +20,7 @@ __author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
 __copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
 __version__ = '0.0.5'
 
-from django.utils import unittest
+from django.test import TestCase
 
 from ..models import *
 from ..signals import *
@@ -33,7 +33,7 @@ class DashboardTestPseudoModel(object):
     def save(self):
         pass
 
-class RegionTestCase(unittest.TestCase):
+class RegionTestCase(TestCase):
     def test_dashboard(self):
         d = DashboardTestPseudoModel(1)
         self.assertEqual(d.dashboard, None)
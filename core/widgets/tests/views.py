@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.test import TestCase
+from django.test.client import Client
+from django.template import Template, Context
+from django.contrib.auth.models import User, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+
+from ..models import *
+
+class WidgetRenderTestCase(TestCase):
+    def test_deferred_rendering(self):
+        region, is_new = Region.objects.get_or_create(slug="deferred_region")
+        template = WidgetTemplate.objects.create(title="Deferred", slug="deferred", source="prometeo.core.widgets.tests.loading.counted_widget")
+        Widget.objects.create(title="Deferred", slug="deferred", region=region, template=template)
+        user = User.objects.create(username="deferred", email="deferred@test.it")
+        user.set_password("test")
+        user.save()
+
+        settings.WIDGET_DEFERRED_RENDERING = True
+        try:
+            output = Template('{% load region %}{% region "deferred_region" %}').render(Context({'user': user}))
+        finally:
+            settings.WIDGET_DEFERRED_RENDERING = False
+        self.assertTrue("/widgets/deferred/render/?index\\u003D0" in output)
+        self.assertFalse("groups" in output)
+
+        client = Client()
+        client.login(username="deferred", password="test")
+        response = client.get("/widgets/deferred/render/", {'index': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue("groups" in response.content)
+        etag = response['ETag']
+        self.assertEqual(client.get("/widgets/deferred/render/", {'index': 0}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(client.get("/widgets/deferred/render/", {'index': 0, 'format': 'json'}, HTTP_IF_NONE_MATCH='"other"')['Content-Type'], 'application/json')
+        self.assertEqual(client.get("/widgets/deferred/render/", {'object': '0-0'}).status_code, 404)
+
+    def test_deferred_rendering_permissions(self):
+        region, is_new = Region.objects.get_or_create(slug="deferred_perms_region")
+        template = WidgetTemplate.objects.create(title="Deferred perms", slug="deferred_perms", source="prometeo.core.widgets.base.dummy")
+        Widget.objects.create(title="Deferred perms", slug="deferred_perms", region=region, template=template)
+        page = User.objects.create(username="deferred_page", email="deferred_page@test.it")
+        user = User.objects.create(username="deferred_perms", email="deferred_perms@test.it")
+        user.set_password("test")
+        user.save()
+        url = "/widgets/deferred_perms/render/"
+        obj = "%d-%d" % (ContentType.objects.get_for_model(User).pk, page.pk)
+
+        client = Client()
+        client.login(username="deferred_perms", password="test")
+        self.assertEqual(client.get(url, {'object': obj}).status_code, 404)
+        user.user_permissions.add(Permission.objects.get_by_natural_key("view_user", "auth", "user"))
+        self.assertEqual(client.get(url, {'object': obj}).status_code, 200)
+        user.user_permissions.remove(Permission.objects.get_by_natural_key("view_widget", "widgets", "widget"))
+        self.assertEqual(client.get(url).status_code, 302)
@@ -27,4 +27,5 @@ urlpatterns = patterns('prometeo.core.widgets.views',
     url(r'^widgets/add/(?P<slug>[-\w]+)/$', view='widget_add', name='widget_add'),
     url(r'^widgets/(?P<slug>[-\w]+)/edit/$', view='widget_edit', name='widget_edit'),
     url(r'^widgets/(?P<slug>[-\w]+)/delete/$', view='widget_delete', name='widget_delete'),
+    url(r'^widgets/(?P<slug>[-\w]+)/render/$', view='widget_render', name='widget_render'),
 )
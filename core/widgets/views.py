@@ -28,17 +28,82 @@ from django.core.urlresolvers import reverse
 from django.template import RequestContext
 from django.template.defaultfilters import slugify
 from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag, parse_etags
+from django.conf import settings
+import django.utils.simplejson as json
 
 from prometeo.core.utils import clean_referer
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
 
 from models import *
 from forms import *
+from loading import registry
+from rendering import render_widget
 
 def _get_widget(request, *args, **kwargs):
     slug = kwargs.get('slug', None)
     return get_object_or_404(Widget, slug=slug)
 
+def _get_rendered_widget(request, *args, **kwargs):
+    widget = registry.get_widget(kwargs.get('slug', None))
+    if widget is None:
+        raise Http404
+    return widget
+
+def _get_page_object(request):
+    """Returns the object of the page which requested a deferred widget (or None).
+    """
+    try:
+        ct_id, sep, pk = request.GET['object'].partition('-')
+        ct = ContentType.objects.get_for_id(int(ct_id))
+        obj = ct.get_object_for_this_type(pk=pk)
+    except KeyError:
+        return None
+    except:
+        raise Http404
+    perm = "%s.view_%s" % (ct.app_label, ct.model)
+    if not (request.user.has_perm(perm, obj) or request.user.has_perm(perm)):
+        raise Http404
+    return obj
+
+@permission_required('widgets.view_widget', _get_rendered_widget)
+def widget_render(request, slug, **kwargs):
+    """Renders a single widget, for regions loading their widgets after the page.
+
+    The user needs the view permission on both the widget and the page
+    object (if any). Widgets whose output is cached are served with an ETag, so the browser
+    can revalidate them cheaply. Add "format=json" to get the output as JSON.
+    """
+    widget = get_cached_obj(request, _get_rendered_widget, slug=slug, **kwargs)
+    context = RequestContext(request, {'object': _get_page_object(request)})
+    try:
+        context['widget_index'] = int(request.GET.get('index', 0))
+    except ValueError:
+        raise Http404
+
+    etag = None
+    key = registry.get_fragment_key(widget, context)
+    if key:
+        etag = key.rpartition(':')[2]
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return HttpResponseNotModified()
+
+    output = render_widget(widget, context)
+    if request.GET.get('format', None) == 'json':
+        response = HttpResponse(json.dumps({'slug': widget.slug, 'html': output}), mimetype='application/json')
+    else:
+        response = HttpResponse(output)
+
+    if etag:
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(response, private=True, max_age=getattr(settings, 'WIDGET_DEFERRED_MAX_AGE', 0), must_revalidate=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 @permission_required('widgets.add_widget')
 def widget_add(request, slug, **kwargs):
     """Adds a new widget to the given region.
@@ -26,6 +26,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 
 from prometeo.core.models import Commentable
+from prometeo.core.auth.managers import VisibilityManager
 
 from managers import *
 
@@ -53,6 +54,8 @@ class Contact(Commentable):
     tags = models.ManyToManyField('taxonomy.Tag', null=True, blank=True, verbose_name=_('tags'))
     stream = models.OneToOneField('notifications.Stream', null=True, verbose_name=_('stream'))
 
+    objects = VisibilityManager()
+
     class Meta:
         verbose_name = _('contact')
         verbose_name_plural = _('contacts')
@@ -108,6 +111,8 @@ class Partner(Commentable):
     dashboard = models.OneToOneField('widgets.Region', null=True, verbose_name=_("dashboard"))
     stream = models.OneToOneField('notifications.Stream', null=True, verbose_name=_('stream'))
 
+    objects = VisibilityManager()
+
     class Meta:
         verbose_name = _('partner')
         verbose_name_plural = _('partners')
@@ -28,9 +28,9 @@ from django.views.generic import list_detail, create_update
 from django.template import RequestContext
 from django.contrib import messages
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
 from prometeo.core.utils import clean_referer
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.views import filtered_list_detail, object_detail
 from prometeo.addressing.views import *
 
 from ..models import *
@@ -51,7 +51,7 @@ def contact_list(request, page=0, paginate_by=10, **kwargs):
     """
     return filtered_list_detail(
         request,
-        Contact,
+        Contact.objects.visible_to(request.user),
         fields=['id', 'firstname', 'lastname', 'language', 'timezone', 'email', 'main_phone_number'],
         paginate_by=paginate_by,
         page=page,
@@ -73,11 +73,11 @@ def contact_add(request, **kwargs):
 def contact_detail(request, id, page=None, **kwargs):
     """Shows contact details.
     """
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
     object_list = Contact.objects.all()
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        object_id=id,
-        queryset=object_list,
+        contact,
         extra_context={
             'object_list': object_list,
         },
@@ -112,7 +112,7 @@ def contact_delete(request, id, **kwargs):
 def contact_addresses(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the contact's addresses.
     """
-    contact = get_object_or_404(Contact, pk=id)
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
 
     return address_list(
         request,
@@ -129,7 +129,7 @@ def contact_add_address(request, id, **kwargs):
     """
     return address_add(
         request,
-        owner=get_object_or_404(Contact, pk=id),
+        owner=get_cached_obj(request, _get_contact, id=id, **kwargs),
         post_save_redirect=reverse('contact_addresses', args=[id]),
         template_name='partners/address_edit.html',
         extra_context={'owner_class': Contact.__name__}
@@ -139,7 +139,7 @@ def contact_add_address(request, id, **kwargs):
 def contact_edit_address(request, contact_id, id, **kwargs):
     """Edits an address of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return address_edit(
         request,
@@ -153,7 +153,7 @@ def contact_edit_address(request, contact_id, id, **kwargs):
 def contact_delete_address(request, contact_id, id, **kwargs):
     """Deletes an address of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return address_delete(
         request,
@@ -167,7 +167,7 @@ def contact_delete_address(request, contact_id, id, **kwargs):
 def contact_phones(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the contact's phone numbers.
     """
-    contact = get_object_or_404(Contact, pk=id)
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
 
     return phone_number_list(
         request,
@@ -184,7 +184,7 @@ def contact_add_phone(request, id, **kwargs):
     """
     return phone_number_add(
         request,
-        owner=get_object_or_404(Contact, pk=id),
+        owner=get_cached_obj(request, _get_contact, id=id, **kwargs),
         post_save_redirect=reverse('contact_phones', args=[id]),
         template_name='partners/phone_edit.html',
         extra_context={'owner_class': Contact.__name__}
@@ -194,7 +194,7 @@ def contact_add_phone(request, id, **kwargs):
 def contact_edit_phone(request, contact_id, id, **kwargs):
     """Edits a phone number of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return phone_number_edit(
         request,
@@ -208,7 +208,7 @@ def contact_edit_phone(request, contact_id, id, **kwargs):
 def contact_delete_phone(request, contact_id, id, **kwargs):
     """Deletes a phone number of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return phone_number_delete(
         request,
@@ -222,7 +222,7 @@ def contact_delete_phone(request, contact_id, id, **kwargs):
 def contact_profiles(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the contact's social profiles.
     """
-    contact = get_object_or_404(Contact, pk=id)
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
 
     return social_profile_list(
         request,
@@ -239,7 +239,7 @@ def contact_add_profile(request, id, **kwargs):
     """
     return social_profile_add(
         request,
-        owner=get_object_or_404(Contact, pk=id),
+        owner=get_cached_obj(request, _get_contact, id=id, **kwargs),
         post_save_redirect=reverse('contact_profiles', args=[id]),
         template_name='partners/profile_edit.html',
         extra_context={'owner_class': Contact.__name__}
@@ -249,7 +249,7 @@ def contact_add_profile(request, id, **kwargs):
 def contact_edit_profile(request, contact_id, id, **kwargs):
     """Edits a social profile of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return social_profile_edit(
         request,
@@ -263,7 +263,7 @@ def contact_edit_profile(request, contact_id, id, **kwargs):
 def contact_delete_profile(request, contact_id, id, **kwargs):
     """Deletes a social profile of the given contact.
     """
-    contact = get_object_or_404(Contact, pk=contact_id)
+    contact = get_cached_obj(request, _get_contact, contact_id=contact_id, id=id, **kwargs)
 
     return social_profile_delete(
         request,
@@ -278,7 +278,7 @@ def contact_delete_profile(request, contact_id, id, **kwargs):
 def contact_jobs(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the contact's jobs.
     """
-    contact = get_object_or_404(Contact, pk=id)
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
 
     return filtered_list_detail(
         request,
@@ -295,7 +295,7 @@ def contact_jobs(request, id, page=0, paginate_by=10, **kwargs):
 def contact_add_job(request, id, **kwargs):
     """Adds a new job to the given contact.
     """
-    contact = get_object_or_404(Contact, pk=id)
+    contact = get_cached_obj(request, _get_contact, id=id, **kwargs)
     instance = Job(contact=contact)
 
     if request.method == 'POST':
@@ -28,8 +28,8 @@ from django.views.generic import list_detail, create_update
 from django.template import RequestContext
 from django.contrib import messages
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail
 from prometeo.addressing.views import *
 
 from ..models import *
@@ -50,7 +50,7 @@ def partner_list(request, page=0, paginate_by=10, **kwargs):
     """
     return filtered_list_detail(
         request,
-        Partner,
+        Partner.objects.visible_to(request.user),
         fields=['name', 'is_managed', 'is_supplier', 'is_customer', 'lead_status', 'vat_number', 'email'],
         page=page,
         paginate_by=paginate_by,
@@ -84,12 +84,12 @@ def partner_add(request, **kwargs):
 def partner_detail(request, id, page=None, **kwargs):
     """Shows partner details.
     """
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
     object_list = Partner.objects.all()
 
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        object_id=id,
-        queryset=object_list,
+        partner,
         extra_context={
             'object_list': object_list,
         },
@@ -124,7 +124,7 @@ def partner_delete(request, id, **kwargs):
 def partner_addresses(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the partner's addresses.
     """
-    partner = get_object_or_404(Partner, pk=id)
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
 
     return address_list(
         request,
@@ -141,7 +141,7 @@ def partner_add_address(request, id, **kwargs):
     """
     return address_add(
         request,
-        owner=get_object_or_404(Partner, pk=id),
+        owner=get_cached_obj(request, _get_partner, id=id, **kwargs),
         post_save_redirect=reverse('partner_addresses', args=[id]),
         template_name='partners/address_edit.html',
         extra_context={'owner_class': Partner.__name__}
@@ -151,7 +151,7 @@ def partner_add_address(request, id, **kwargs):
 def partner_edit_address(request, partner_id, id, **kwargs):
     """Edits an address of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return address_edit(
         request,
@@ -165,7 +165,7 @@ def partner_edit_address(request, partner_id, id, **kwargs):
 def partner_delete_address(request, partner_id, id, **kwargs):
     """Deletes an address of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return address_delete(
         request,
@@ -179,7 +179,7 @@ def partner_delete_address(request, partner_id, id, **kwargs):
 def partner_phones(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the partner's phone numbers.
     """
-    partner = get_object_or_404(Partner, pk=id)
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
 
     return phone_number_list(
         request,
@@ -196,7 +196,7 @@ def partner_add_phone(request, id, **kwargs):
     """
     return phone_number_add(
         request,
-        owner=get_object_or_404(Partner, pk=id),
+        owner=get_cached_obj(request, _get_partner, id=id, **kwargs),
         post_save_redirect=reverse('partner_phones', args=[id]),
         template_name='partners/phone_edit.html',
         extra_context={'owner_class': Partner.__name__}
@@ -206,7 +206,7 @@ def partner_add_phone(request, id, **kwargs):
 def partner_edit_phone(request, partner_id, id, **kwargs):
     """Edits a phone number of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return phone_number_edit(
         request,
@@ -220,7 +220,7 @@ def partner_edit_phone(request, partner_id, id, **kwargs):
 def partner_delete_phone(request, partner_id, id, **kwargs):
     """Deletes a phone number of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return phone_number_delete(
         request,
@@ -234,7 +234,7 @@ def partner_delete_phone(request, partner_id, id, **kwargs):
 def partner_profiles(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the partner's social profiles.
     """
-    partner = get_object_or_404(Partner, pk=id)
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
 
     return social_profile_list(
         request,
@@ -251,7 +251,7 @@ def partner_add_profile(request, id, **kwargs):
     """
     return social_profile_add(
         request,
-        owner=get_object_or_404(Partner, pk=id),
+        owner=get_cached_obj(request, _get_partner, id=id, **kwargs),
         post_save_redirect=reverse('partner_profiles', args=[id]),
         template_name='partners/profile_edit.html',
         extra_context={'owner_class': Partner.__name__}
@@ -261,7 +261,7 @@ def partner_add_profile(request, id, **kwargs):
 def partner_edit_profile(request, partner_id, id, **kwargs):
     """Edits a social profile of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return social_profile_edit(
         request,
@@ -275,7 +275,7 @@ def partner_edit_profile(request, partner_id, id, **kwargs):
 def partner_delete_profile(request, partner_id, id, **kwargs):
     """Deletes a social profile of the given partner.
     """
-    partner = get_object_or_404(Partner, pk=partner_id)
+    partner = get_cached_obj(request, _get_partner, partner_id=partner_id, id=id, **kwargs)
 
     return social_profile_delete(
         request,
@@ -290,7 +290,7 @@ def partner_delete_profile(request, partner_id, id, **kwargs):
 def partner_contacts(request, id, page=0, paginate_by=10, **kwargs):
     """Shows the partner's contacts.
     """
-    partner = get_object_or_404(Partner, pk=id)
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
 
     return filtered_list_detail(
         request,
@@ -307,7 +307,7 @@ def partner_contacts(request, id, page=0, paginate_by=10, **kwargs):
 def partner_add_contact(request, id, **kwargs):
     """Adds a new contact to the given partner.
     """
-    partner = get_object_or_404(Partner, pk=id)
+    partner = get_cached_obj(request, _get_partner, id=id, **kwargs)
     instance = Job(partner=partner)
 
     if request.method == 'POST':
@@ -22,7 +22,9 @@ __version__ = '0.0.5'
 
 from django.db import models
 
-class TicketManager(models.Manager):
+from prometeo.core.auth.managers import VisibilityManager
+
+class TicketManager(VisibilityManager):
     """Custom manager for Ticket model.
     """
     def opened(self):
@@ -50,6 +50,8 @@ class Project(Commentable):
     dashboard = models.OneToOneField('widgets.Region', null=True, verbose_name=_('dashboard'))
     stream = models.OneToOneField('notifications.Stream', null=True, verbose_name=_('stream'))
 
+    objects = VisibilityManager()
+
     class Meta:
         ordering = ['code']
         verbose_name = _('project')
@@ -105,6 +107,8 @@ class Milestone(Commentable):
     dashboard = models.OneToOneField('widgets.Region', null=True, verbose_name=_('dashboard'))
     stream = models.OneToOneField('notifications.Stream', null=True, verbose_name=_('stream'))
 
+    objects = VisibilityManager()
+
     class Meta:
         ordering = ['project', 'deadline', 'code']
         verbose_name = _('milestone')
@@ -39,26 +39,14 @@ def update_manager_permissions(sender, instance, *args, **kwargs):
     """
     model_name = sender.__name__.lower()
 
-    can_view_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_%s" % model_name, "projects", model_name, instance.pk)
-    can_change_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_%s" % model_name, "projects", model_name, instance.pk)
-    can_delete_this_object, is_new = ObjectPermission.objects.get_or_create_by_natural_key("delete_%s" % model_name, "projects", model_name, instance.pk)
-
-    if instance.manager:
-        can_view_this_object.users.add(instance.manager)
-        can_change_this_object.users.add(instance.manager)
-        can_delete_this_object.users.add(instance.manager)
+    if instance.manager_id:
+        ObjectPermission.objects.grant(instance.manager_id, ("view_%s" % model_name, "change_%s" % model_name, "delete_%s" % model_name), instance)
 
 def update_assignee_permissions(sender, instance, *args, **kwargs):
     """Updates the permissions of the assignee of the given ticket.
     """
-    can_view_this_ticket, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_ticket", "projects", "ticket", instance.pk)
-    can_change_this_ticket, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_ticket", "projects", "ticket", instance.pk)
-    can_delete_this_ticket, is_new = ObjectPermission.objects.get_or_create_by_natural_key("delete_ticket", "projects", "ticket", instance.pk)
-
-    if instance.manager:
-        can_view_this_ticket.users.add(instance.assignee)
-        can_change_this_ticket.users.add(instance.assignee)
-        can_delete_this_ticket.users.add(instance.assignee)
+    if instance.assignee_id:
+        ObjectPermission.objects.grant(instance.assignee_id, ("view_ticket", "change_ticket", "delete_ticket"), instance)
 
 def link_project_stream(sender, instance, **kwargs):
     """Links the given stream to the parent project's one.
@@ -27,8 +27,8 @@ from django.views.generic.simple import redirect_to
 from django.template import RequestContext
 from django.contrib import messages
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail
 
 from ..models import *
 from ..forms import *
@@ -36,7 +36,7 @@ from ..forms import *
 def _get_milestone(request, *args, **kwargs):
     project_code = kwargs.get('project', None)
     milestone_code = kwargs.get('code', None)
-    return get_object_or_404(Milestone, code=milestone_code, project__code=project_code)
+    return get_object_or_404(Milestone.objects.select_related('project'), code=milestone_code, project__code=project_code)
 
 @permission_required('projects.view_milestone') 
 def milestone_list(request, project, page=0, paginate_by=5, **kwargs):
@@ -45,7 +45,7 @@ def milestone_list(request, project, page=0, paginate_by=5, **kwargs):
     project = get_object_or_404(Project, code=project)
     return filtered_list_detail(
         request,
-        project.milestone_set.all(),
+        project.milestone_set.visible_to(request.user),
         fields=['code', 'title', 'parent', 'author', 'manager', 'created', 'deadline', 'closed'],
         paginate_by=paginate_by,
         page=page,
@@ -57,13 +57,12 @@ def milestone_list(request, project, page=0, paginate_by=5, **kwargs):
 def milestone_detail(request, project, code, **kwargs):
     """Show milestone details.
     """
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
+    project = milestone.project
     object_list = project.milestone_set.all()
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        object_id=milestone.pk,
-        queryset=object_list,
+        milestone,
         extra_context={'object_list': object_list},
         **kwargs
     )
@@ -89,8 +88,7 @@ def milestone_add(request, project, **kwargs):
 def milestone_edit(request, project, code, **kwargs):
     """Edits a milestone.
     """
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, project=project, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
     if request.method == 'POST':
         form = MilestoneForm(request.POST, instance=milestone)
         if form.is_valid():
@@ -106,8 +104,8 @@ def milestone_edit(request, project, code, **kwargs):
 def milestone_delete(request, project, code, **kwargs):
     """Deletes a milestone.
     """ 
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, project=project, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
+    project = milestone.project
     return create_update.delete_object(
         request,
         model=Milestone,
@@ -121,8 +119,7 @@ def milestone_delete(request, project, code, **kwargs):
 def milestone_close(request, project, code, **kwargs):
     """Closes an open milestone.
     """
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
 
     milestone.closed = datetime.datetime.now()
     milestone.save()
@@ -134,8 +131,7 @@ def milestone_close(request, project, code, **kwargs):
 def milestone_reopen(request, project, code, **kwargs):
     """Reopens a closed milestone.
     """
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
 
     milestone.closed = None
     milestone.save()
@@ -148,11 +144,11 @@ def milestone_reopen(request, project, code, **kwargs):
 def milestone_tickets(request, project, code, page=0, paginate_by=5, **kwargs):
     """Displays the list of all tickets of a specified milestone.
     """
-    project = get_object_or_404(Project, code=project)
-    milestone = get_object_or_404(Milestone, code=code)
+    milestone = get_cached_obj(request, _get_milestone, project=project, code=code, **kwargs)
+    project = milestone.project
     return filtered_list_detail(
         request,
-        milestone.tickets.all(),
+        milestone.tickets.visible_to(request.user),
         fields=['id', 'title', 'parent', 'author', 'manager', 'created', 'closed', 'urgency', 'status'],
         paginate_by=paginate_by,
         page=page,
@@ -27,8 +27,8 @@ from django.views.generic.simple import redirect_to
 from django.template import RequestContext
 from django.contrib import messages
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail
 
 from ..models import *
 from ..forms import *
@@ -43,7 +43,7 @@ def project_list(request, page=0, paginate_by=5, **kwargs):
     """
     return filtered_list_detail(
         request,
-        Project,
+        Project.objects.visible_to(request.user),
         fields=['code', 'title', 'author', 'manager', 'created', 'status'],
         paginate_by=paginate_by,
         page=page,
@@ -54,13 +54,8 @@ def project_list(request, page=0, paginate_by=5, **kwargs):
 def project_detail(request, code, **kwargs):
     """Displays the selected project.
     """
-    project = get_object_or_404(Project, code=code)
-    return list_detail.object_detail(
-        request,
-        object_id=project.pk,
-        queryset=Project.objects.all(),
-        **kwargs
-    )
+    project = get_cached_obj(request, _get_project, code=code, **kwargs)
+    return object_detail(request, project, **kwargs)
 
 @permission_required('projects.add_project')     
 def project_add(request, **kwargs):
@@ -82,7 +77,7 @@ def project_add(request, **kwargs):
 def project_edit(request, code, **kwargs):
     """Edits a project.
     """
-    project = get_object_or_404(Project, code=code)
+    project = get_cached_obj(request, _get_project, code=code, **kwargs)
     if request.method == 'POST':
         form = ProjectForm(request.POST, instance=project)
         if form.is_valid():
@@ -98,7 +93,7 @@ def project_edit(request, code, **kwargs):
 def project_delete(request, code, **kwargs):
     """Deletes a project.
     """
-    project = get_object_or_404(Project, code=code)
+    project = get_cached_obj(request, _get_project, code=code, **kwargs)
     return create_update.delete_object(
         request,
         model=Project,
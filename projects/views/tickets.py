@@ -27,8 +27,8 @@ from django.views.generic.simple import redirect_to
 from django.template import RequestContext
 from django.contrib import messages
 
-from prometeo.core.auth.decorators import obj_permission_required as permission_required
-from prometeo.core.views import filtered_list_detail
+from prometeo.core.auth.decorators import obj_permission_required as permission_required, get_cached_obj
+from prometeo.core.views import filtered_list_detail, object_detail
 
 from ..models import *
 from ..forms import *
@@ -36,7 +36,7 @@ from ..forms import *
 def _get_ticket(request, *args, **kwargs):
     code = kwargs.get('code', None)
     project_code = kwargs.get('project', None)
-    return get_object_or_404(Ticket, code=code, project__code=project_code)
+    return get_object_or_404(Ticket.objects.select_related('project'), code=code, project__code=project_code)
 
 @permission_required('projects.view_ticket') 
 def ticket_list(request, project, page=0, paginate_by=5, **kwargs):
@@ -45,7 +45,7 @@ def ticket_list(request, project, page=0, paginate_by=5, **kwargs):
     project = get_object_or_404(Project, code=project)
     return filtered_list_detail(
         request,
-        project.tickets.all(),
+        project.tickets.visible_to(request.user),
         fields=['code', 'title', 'parent', 'author', 'manager', 'created', 'closed', 'urgency', 'status'],
         paginate_by=paginate_by,
         page=page,
@@ -59,13 +59,12 @@ def ticket_list(request, project, page=0, paginate_by=5, **kwargs):
 def ticket_detail(request, project, code, **kwargs):
     """Show ticket details.
     """
-    project = get_object_or_404(Project, code=project)
-    ticket = get_object_or_404(Ticket, project=project, code=code)
+    ticket = get_cached_obj(request, _get_ticket, project=project, code=code, **kwargs)
+    project = ticket.project
     object_list = project.tickets.all()
-    return list_detail.object_detail(
+    return object_detail(
         request,
-        object_id=ticket.pk,
-        queryset=object_list,
+        ticket,
         extra_context={'object_list': object_list},
         **kwargs
     )
@@ -104,8 +103,8 @@ def ticket_add(request, project, milestone=None, **kwargs):
 def ticket_edit(request, project, code, **kwargs):
     """Edits a ticket.
     """
-    project = get_object_or_404(Project, code=project)
-    ticket = get_object_or_404(Ticket, project=project, code=code)
+    ticket = get_cached_obj(request, _get_ticket, project=project, code=code, **kwargs)
+    project = ticket.project
     if request.method == 'POST':
         form = TicketForm(request.POST, instance=ticket)
         if form.is_valid():
@@ -127,8 +126,8 @@ def ticket_edit(request, project, code, **kwargs):
 def ticket_delete(request, project, code, **kwargs):
     """Deletes a ticket.
     """
-    project = get_object_or_404(Project, code=project)
-    ticket = get_object_or_404(Ticket, project=project, code=code)
+    ticket = get_cached_obj(request, _get_ticket, project=project, code=code, **kwargs)
+    project = ticket.project
     return create_update.delete_object(
         request,
         model=Ticket,
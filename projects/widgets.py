@@ -22,6 +22,8 @@ __version__ = '0.0.5'
 
 from django.db.models import Q
 
+from prometeo.core.widgets.loading import registry
+
 from models import Project, Milestone, Ticket
 
 def my_projects(context):
@@ -56,3 +58,7 @@ def latest_tickets(context):
     except:
         context['ticket_list'] = None
     return context
+
+registry.register_dependencies(my_projects, Project)
+registry.register_dependencies(my_latest_tickets, Ticket, Project)
+registry.register_dependencies(latest_tickets, Ticket, Milestone, Project)
@@ -48,6 +48,9 @@ MIDDLEWARE_CLASSES += (
     'prometeo.core.auth.middleware.LoggedInUserCacheMiddleware',
 )
 
+# Lifetime (in seconds) of the object permissions stored in the cache backend.
+OBJECT_PERMISSION_CACHE_TIMEOUT = 3600
+
 AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
     'prometeo.core.auth.backends.ObjectPermissionBackend',
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from django.utils.translation import ugettext_lazy as _
+
+JOB_STATUS_CHOICES = (
+    ('PENDING', _('pending')),
+    ('RUNNING', _('running')),
+    ('FAILED', _('failed')),
+)
+
+# If True, queued jobs are run immediately (i.e. no workers are needed).
+# Otherwise nothing queued (i.e. activities, notifications, e-mails) is
+# processed until "python manage.py runjobs" is running.
+JOB_QUEUE_EAGER = False
+
+# Max number of jobs claimed at once by a worker.
+JOB_BATCH_SIZE = 50
+
+# Max number of attempts before a job is marked as failed.
+JOB_MAX_ATTEMPTS = 5
+
+# Delay (in seconds) before the first retry, doubled at each attempt.
+JOB_RETRY_DELAY = 60
+
+# Seconds after which a job locked by a dead worker can be claimed again.
+JOB_LOCK_TIMEOUT = 300
+
+# Number of lookups after which a process adds its cache hits and misses to
+# the totals reported by "manage.py cachestats".
+CACHE_STATS_FLUSH_INTERVAL = 100
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+from base import TEMPLATE_CONTEXT_PROCESSORS
+
+# Minimum interval (in seconds) between two digest e-mails to the same user.
+NOTIFICATION_DIGEST_INTERVAL = 3600
+
+# Max number of e-mails sent by the outbox flusher in a single batch.
+NOTIFICATION_EMAIL_BATCH_SIZE = 500
+
+# Seconds after which e-mails claimed by an interrupted flush can be sent again.
+NOTIFICATION_EMAIL_CLAIM_TIMEOUT = 600
+
+# Lifetime (in seconds) of the rendered activities stored in the cache backend.
+ACTIVITY_CACHE_TIMEOUT = 604800
+
+# Bump it to invalidate the rendered activities after changing their templates.
+ACTIVITY_TEMPLATES_VERSION = 1
+
+# Number of activities in a page of the user timeline.
+TIMELINE_PAGE_SIZE = 20
+
+TEMPLATE_CONTEXT_PROCESSORS += (
+    'prometeo.core.notifications.context_processors.unread_notifications',
+)
+
+# Days after which activities are deleted by "manage.py prune" (None means
+# forever), optionally overridden per signature, e.g. {'ticket-changed': 90}.
+ACTIVITY_RETENTION_DAYS = None
+ACTIVITY_RETENTION_DAYS_BY_SIGNATURE = {}
+
+# Days after which notifications are deleted by "manage.py prune" (None means
+# forever), optionally overridden per signature slug.
+NOTIFICATION_RETENTION_DAYS = None
+NOTIFICATION_RETENTION_DAYS_BY_SIGNATURE = {}
+
+# Max number of rows deleted per transaction by "manage.py prune".
+PRUNE_BATCH_SIZE = 5000
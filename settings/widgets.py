@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""This file is part of the prometeo project.
+
+This program is free software: you can redistribute it and/or modify it 
+under the terms of the GNU Lesser General Public License as published by the
+Free Software Foundation, either version 3 of the License, or (at your
+option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+
+__author__ = 'Emanuele Bertoldi <emanuele.bertoldi@gmail.com>'
+__copyright__ = 'Copyright (c) 2011 Emanuele Bertoldi'
+__version__ = '0.0.5'
+
+# Lifetime (in seconds) of the widgets and region widget lists stored in the cache backend.
+WIDGET_REGION_CACHE_TIMEOUT = 3600
+
+# Lifetime (in seconds) of the cached output of the widgets.
+WIDGET_FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Renders the widgets of a region concurrently, in a pool of
+# WIDGET_RENDERING_THREADS threads. Widgets not rendered within
+# WIDGET_RENDERING_TIMEOUT seconds are replaced by a placeholder.
+WIDGET_CONCURRENT_RENDERING = False
+WIDGET_RENDERING_THREADS = 4
+WIDGET_RENDERING_TIMEOUT = 5
+
+# Renders only placeholders for the widgets of a region: each widget is then
+# loaded by the browser. Widgets with a cached output are served with an ETag
+# and can be reused by the browser for WIDGET_DEFERRED_MAX_AGE seconds.
+WIDGET_DEFERRED_RENDERING = False
+WIDGET_DEFERRED_MAX_AGE = 0
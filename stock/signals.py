@@ -37,14 +37,8 @@ from models import *
 def update_manager_permissions(sender, instance, *args, **kwargs):
     """Updates the permissions assigned to the manager of the given warehouse.
     """
-    can_view_this_warehouse, is_new = ObjectPermission.objects.get_or_create_by_natural_key("view_warehouse", "stock", "warehouse", instance.pk)
-    can_change_this_warehouse, is_new = ObjectPermission.objects.get_or_create_by_natural_key("change_warehouse", "stock", "warehouse", instance.pk)
-    can_delete_this_warehouse, is_new = ObjectPermission.objects.get_or_create_by_natural_key("delete_warehouse", "stock", "warehouse", instance.pk)
-
-    if instance.manager:
-        can_view_this_warehouse.users.add(instance.manager)
-        can_change_this_warehouse.users.add(instance.manager)
-        can_delete_this_warehouse.users.add(instance.manager)
+    if instance.manager_id:
+        ObjectPermission.objects.grant(instance.manager_id, ("view_warehouse", "change_warehouse", "delete_warehouse"), instance)
 
 ## CONNECTIONS ##
 
@@ -20,6 +20,8 @@ __version__ = '0.0.5'
 
 from datetime import date
 
+from prometeo.core.widgets.loading import registry
+
 from models import Task
 
 def latest_tasks(context):
@@ -61,3 +63,8 @@ def today_tasks(context):
     request = context['request']
     context['object_list'] = Task.objects.filter(user=request.user, start__startswith=date.today())
     return context
+
+registry.register_dependencies(latest_tasks, Task)
+registry.register_dependencies(latest_planned_tasks, Task)
+registry.register_dependencies(latest_unplanned_tasks, Task)
+registry.register_dependencies(today_tasks, Task)